@@ -0,0 +1,134 @@
+"""
+NYC Restaurant Week Batch Runner
+================================
+Rebuilds several datasets in one go (archived seasons, other cities'
+restaurant weeks), running the pipeline for each on a process pool:
+
+    python batch_pipeline.py jobs.json
+
+jobs.json holds a list of job specs:
+
+    [
+        {"season": "2025-winter", "base_url": "https://.../restaurant-week/?season=2025-winter",
+         "city_suffix": ", New York, NY", "output_dir": "seasons/2025-winter"},
+        ...
+    ]
+
+Only "season" is required. "base_url" and "city_suffix" default to the
+pipeline's BASE_URL and CITY_SUFFIX, and "output_dir" to the season name.
+Any other keys are passed on to run_pipeline() (e.g. "compact_json"). The
+NYC coordinate checks are skipped for jobs with another city's
+"city_suffix". Every job shares one geocode cache and one API rate limit,
+and writes its progress to pipeline.log in its output directory.
+"""
+
+import argparse
+import contextlib
+import functools
+import json
+import multiprocessing
+import os
+import time
+
+import nyc_restaurant_pipeline as pipeline
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+JOB_WORKERS = 4  # Jobs run at once, each in its own process
+LOG_FILE = "pipeline.log"  # Per-job output, inside the job's output directory
+
+
+def load_jobs(jobs_file):
+    """Read a list of job specs from a JSON file."""
+    
+    with open(jobs_file, encoding="utf-8") as f:
+        jobs = json.load(f)
+    
+    for job in jobs:
+        if "season" not in job:
+            raise ValueError(f"Job spec without a season: {job}")
+    return jobs
+
+
+def init_worker(limiter):
+    """Pool initializer: throttle this process's API requests with the batch's shared limiter."""
+    
+    pipeline.SHARED_LIMITER = limiter
+
+
+def run_job(job, api_key, cache_file):
+    """Run the pipeline for one job spec in this process; returns a summary dict."""
+    
+    settings = dict(job)
+    season = settings.pop("season")
+    output_dir = settings.pop("output_dir", season)
+    os.makedirs(output_dir, exist_ok=True)
+    log_file = os.path.join(output_dir, LOG_FILE)
+    
+    start = time.time()
+    with open(log_file, "w", encoding="utf-8") as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        html_file = pipeline.run_pipeline(api_key, cache_file, output_dir=output_dir, **settings)
+    
+    return {
+        "season": season,
+        "output_dir": output_dir,
+        "ok": html_file is not None,
+        "seconds": round(time.time() - start, 1),
+        "log": log_file
+    }
+
+
+def run_batch(jobs, api_key=pipeline.API_KEY, cache_file=pipeline.CACHE_FILE, workers=JOB_WORKERS,
+              qps=pipeline.REQUESTS_PER_SECOND):
+    """Run every job on a pool of `workers` processes; returns one summary per job.
+    
+    All jobs look up places through the same `cache_file` and share one
+    `qps` request budget, so the batch stays within the API key's quota
+    however many jobs run at once.
+    """
+    
+    print("=" * 80)
+    print(f"BATCH: {len(jobs)} JOBS ON {workers} PROCESSES")
+    print("=" * 80)
+    
+    cache_file = cache_file and os.path.abspath(cache_file)
+    limiter = pipeline.SharedTokenBucket(qps)
+    job = functools.partial(run_job, api_key=api_key, cache_file=cache_file)
+    
+    results = []
+    start = time.time()
+    with multiprocessing.Pool(workers, initializer=init_worker, initargs=(limiter,)) as pool:
+        for result in pool.imap_unordered(job, jobs):
+            results.append(result)
+            mark = "✓" if result["ok"] else "✗"
+            print(f"  {mark} {result['season']}: {result['seconds']:.1f}s → {result['output_dir']} (log: {result['log']})")
+    
+    failed = sum(not result["ok"] for result in results)
+    print(f"\n✓ Finished {len(results) - failed}/{len(results)} jobs in {time.time() - start:.1f}s")
+    if failed:
+        print(f"✗ {failed} jobs failed; see their logs")
+    
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the pipeline for several seasons or cities at once.")
+    parser.add_argument("jobs_file", help="JSON file with a list of job specs")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS, help="jobs to run at once")
+    parser.add_argument("--qps", type=float, default=pipeline.REQUESTS_PER_SECOND,
+                        help="API requests per second across all jobs")
+    parser.add_argument("--api-key", default=pipeline.API_KEY, help="Google API key")
+    parser.add_argument("--cache-file", default=pipeline.CACHE_FILE, help="geocode cache shared by every job")
+    args = parser.parse_args()
+    if args.qps <= 0:
+        parser.error("--qps must be positive")
+    
+    results = run_batch(load_jobs(args.jobs_file), args.api_key, args.cache_file, args.workers, args.qps)
+    raise SystemExit(0 if all(result["ok"] for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+NYC Restaurant Week Pipeline Benchmark
+======================================
+Runs the pipeline's stages against local stand-ins for the restaurant-week
+listing and the Google Places and Geocoding APIs, so performance can be
+measured without network access or an API key:
+
+    python benchmark_pipeline.py
+    python benchmark_pipeline.py --rows 500 5000 --latency-ms 50 --error-rate 0.01
+
+For each dataset size it times scrape_restaurant_week, append_city_to_neighborhoods,
+fetch_addresses, fetch_coordinates and convert_csv_to_json, then the same
+scrape and lookups as one stream (stream_restaurants), and reports
+throughput plus p50/p99 request latency per stage. Results are also
+written to benchmark_results.json.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import http.server
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+import nyc_restaurant_pipeline as pipeline
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+ROW_COUNTS = (500, 5000, 50000)
+LATENCY_MS = 20  # Mean response time of the mock servers (uniform between half and 1.5x)
+ERROR_RATE = 0.0  # Share of API requests answered with HTTP 500
+QUOTA_QPS = None  # Answer OVER_QUERY_LIMIT above this many API requests per second
+WORKERS = 32
+CARDS_PER_PAGE = 12
+RESULTS_FILE = "benchmark_results.json"
+
+CUISINES = ("Italian", "American (New)", "Japanese", "Mexican", "French", "Indian", "Steakhouse", "Seafood")
+NEIGHBORHOODS = ("Midtown West", "Upper East Side", "West Village", "Williamsburg", "Astoria", "Harlem", "Soho")
+
+# ============================================================================
+# MOCK SERVERS
+# ============================================================================
+
+def listing_page(page, rows):
+    """HTML for one listing page, with the same card markup and pagination as the real site."""
+    
+    page_count = math.ceil(rows / CARDS_PER_PAGE)
+    cards = []
+    for i in range((page - 1) * CARDS_PER_PAGE, min(page * CARDS_PER_PAGE, rows)):
+        cards.append(
+            f'<div class="card"><h3 class="CardHeading_headline__qu1q3">Benchmark Restaurant {i}</h3>'
+            f'<div class="PromotionCardGrid_taglines__qTyHJ">'
+            f'<div class="Tag_tag__cc4nK">{CUISINES[i % len(CUISINES)]}</div>'
+            f'<div class="Tag_tag__cc4nK">{NEIGHBORHOODS[i % len(NEIGHBORHOODS)]}</div></div></div>'
+        )
+    
+    links = "".join(f'<li><a href="?page={n}">{n}</a></li>' for n in sorted({1, 2, page, page_count}))
+    disabled = " disabled" if page >= page_count else ""
+    return (f'<html><body><div class="grid">{"".join(cards)}</div><ul class="pagination">{links}'
+            f'<li class="next{disabled}"><a href="?page={page + 1}">Next</a></li></ul></body></html>')
+
+
+def mock_location(text):
+    """A stable location inside Manhattan for a query or address."""
+    
+    digest = hashlib.md5(text.encode("utf-8")).digest()
+    return 40.71 + digest[0] / 255 * 0.08, -74.01 + digest[1] / 255 * 0.05
+
+
+class MockHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the listing pages and the two Google API endpoints."""
+    
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real servers
+    
+    def do_GET(self):
+        config = self.server.config
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        time.sleep(config["latency"] * random.uniform(0.5, 1.5))
+        
+        if parts.path.startswith("/maps/api/"):
+            if random.random() < config["error_rate"]:
+                return self.reply(500, b"")
+            if not self.server.within_quota():
+                return self.reply_json({"status": "OVER_QUERY_LIMIT", "results": []})
+            
+            text = query.get("query") or query.get("address", "")
+            lat, lng = mock_location(text)
+            address = text if parts.path.endswith("/geocode/json") else f"{text.split(',')[0]}, New York, NY 10001, USA"
+            return self.reply_json({"status": "OK", "results": [{
+                "formatted_address": address,
+                "geometry": {"location": {"lat": lat, "lng": lng}}
+            }]})
+        
+        page = int(query.get("page", 1))
+        self.reply(200, listing_page(page, config["rows"]).encode("utf-8"), "text/html")
+    
+    def reply_json(self, body):
+        self.reply(200, json.dumps(body).encode("utf-8"), "application/json")
+    
+    def reply(self, status, body, content_type="text/plain"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+class MockServer(http.server.ThreadingHTTPServer):
+    """Local server for MockHandler, with a per-second API request quota."""
+    
+    daemon_threads = True
+    
+    def __init__(self, rows, latency_ms=LATENCY_MS, error_rate=ERROR_RATE, quota_qps=QUOTA_QPS):
+        super().__init__(("127.0.0.1", 0), MockHandler)
+        self.config = {"rows": rows, "latency": latency_ms / 1000, "error_rate": error_rate}
+        self.quota_qps = quota_qps
+        self.quota_lock = threading.Lock()
+        self.quota_second = 0
+        self.quota_used = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+    
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+    
+    def within_quota(self):
+        if self.quota_qps is None:
+            return True
+        with self.quota_lock:
+            second = int(time.time())
+            if second != self.quota_second:
+                self.quota_second, self.quota_used = second, 0
+            self.quota_used += 1
+            return self.quota_used <= self.quota_qps
+    
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def time_stage(name, rows, func):
+    """Run one stage with its output silenced; return its timings and request stats."""
+    
+    pipeline.METRICS.reset()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        func()
+    seconds = time.perf_counter() - start
+    
+    latencies = [s for endpoint in pipeline.METRICS.latencies.values() for s in endpoint]
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99]) if latencies else (None, None)
+    return {
+        "stage": name,
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_s": round(rows / seconds, 1),
+        "requests": len(latencies),
+        "errors": sum(pipeline.METRICS.errors.values()),
+        "retries": sum(pipeline.METRICS.retries.values()),
+        "p50_ms": None if p50 is None else round(p50, 1),
+        "p99_ms": None if p99 is None else round(p99, 1)
+    }
+
+
+def benchmark(rows, latency_ms=LATENCY_MS, error_rate=ERROR_RATE, quota_qps=QUOTA_QPS, workers=WORKERS):
+    """Benchmark every stage on `rows` restaurants; returns one result per stage."""
+    
+    server = MockServer(rows, latency_ms, error_rate, quota_qps)
+    workdir = tempfile.mkdtemp(prefix="pipeline_benchmark_")
+    original_dir = os.getcwd()
+    original_urls = pipeline.PLACES_URL, pipeline.GEOCODE_URL
+    pipeline.PLACES_URL = f"{server.url}/maps/api/place/textsearch/json"
+    pipeline.GEOCODE_URL = f"{server.url}/maps/api/geocode/json"
+    
+    # No request throttling: the mock server's quota (if any) is what's being tested
+    qps = 1_000_000
+    pages = math.ceil(rows / CARDS_PER_PAGE)
+    stages = [
+        ("scrape_restaurant_week",
+         lambda: pipeline.scrape_restaurant_week("http", f"{server.url}/restaurant-week/", pages, workers)),
+        ("append_city_to_neighborhoods",
+         lambda: pipeline.append_city_to_neighborhoods("nyc_restaurant_week.csv")),
+        ("fetch_addresses",
+         lambda: pipeline.fetch_addresses("nyc_restaurants_nyc.csv", "benchmark-key", None, workers, qps)),
+        ("fetch_coordinates",
+         lambda: pipeline.fetch_coordinates("restaurants_with_addresses.csv", "benchmark-key", None, workers, qps)),
+        ("convert_csv_to_json",
+         lambda: pipeline.convert_csv_to_json("restaurants_with_coordinates.csv")),
+        # Steps 1-4 again as one stream, for comparison with the sum of the stages above
+        ("stream_restaurants",
+         lambda: pipeline.stream_restaurants("benchmark-key", None, False, f"{server.url}/restaurant-week/",
+                                             pages, workers, qps, workers)),
+    ]
+    
+    results = []
+    try:
+        os.chdir(workdir)
+        for name, func in stages:
+            result = time_stage(name, rows, func)
+            results.append(result)
+            print_result(result)
+    finally:
+        os.chdir(original_dir)
+        pipeline.PLACES_URL, pipeline.GEOCODE_URL = original_urls
+        shutil.rmtree(workdir, ignore_errors=True)
+        server.close()
+    
+    return results
+
+
+def print_result(result):
+    latency = "-" if result["p50_ms"] is None else f"{result['p50_ms']:.1f} / {result['p99_ms']:.1f}"
+    print(f"  {result['stage']:<30} {result['seconds']:>8.2f}s {result['rows_per_s']:>10.0f} rows/s"
+          f" {result['requests']:>7} req  p50/p99 {latency:>13} ms  retries {result['retries']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline against local mock servers.")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(ROW_COUNTS), help="dataset sizes to run")
+    parser.add_argument("--latency-ms", type=float, default=LATENCY_MS, help="mean mock response time")
+    parser.add_argument("--error-rate", type=float, default=ERROR_RATE, help="share of API requests failing with HTTP 500")
+    parser.add_argument("--quota-qps", type=int, default=QUOTA_QPS, help="API requests per second before OVER_QUERY_LIMIT")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="concurrent requests per stage")
+    parser.add_argument("--output", default=RESULTS_FILE, help="where to write the JSON results")
+    args = parser.parse_args()
+    
+    config = {
+        "latency_ms": args.latency_ms,
+        "error_rate": args.error_rate,
+        "quota_qps": args.quota_qps,
+        "workers": args.workers
+    }
+    print(f"Benchmark settings: {config}")
+    
+    results = []
+    for rows in args.rows:
+        print(f"\n{rows} restaurants:")
+        results.extend(benchmark(rows, args.latency_ms, args.error_rate, args.quota_qps, args.workers))
+    
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"config": config, "results": results}, f, indent=2)
+    print(f"\n✓ Saved results to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
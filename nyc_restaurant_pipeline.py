@@ -5,7 +5,7 @@ Complete pipeline that:
 1. Scrapes restaurant data from NYC Tourism website
 2. Appends ", New York, NY" to neighborhoods
 3. Fetches addresses using Google Places API
-4. Fetches coordinates using Google Geocoding API
+4. Fetches coordinates from the same Places response (Geocoding API as fallback)
 5. Converts CSV to JSON for the interactive map
 """
 
@@ -13,14 +13,56 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
+import numpy as np
 import pandas as pd
 import requests
-import csv
 import time
 import json
+import base64
+import csv
+import gzip
+import os
+import random
+import re
+import cProfile
+import shutil
+import subprocess
+import tempfile
+import multiprocessing
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+from requests.adapters import HTTPAdapter
+
+from restaurant_reconcile import ReconcileIndex
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:  # Only needed for the browserless scraper backend
+    BeautifulSoup = None
+
+try:
+    import brotli
+except ImportError:  # Only needed for the precompressed .br copy of restaurants.json
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:  # Only needed to minify the bundled map page
+    rjsmin = None
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
 
 # ============================================================================
 # CONFIGURATION
@@ -28,14 +70,765 @@ import json
 
 API_KEY = "YOUR_GOOGLE_API_KEY_HERE"  # Replace with your actual API key
 
+CITY_SUFFIX = ", New York, NY"  # Appended to neighborhoods for the API lookups
+PLACES_URL = "https://maps.googleapis.com/maps/api/place/textsearch/json"
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+BASE_URL = "https://www.nyctourism.com/restaurant-week/"
+SCRAPER_BACKEND = "http"  # "http" (no browser) or "selenium" (headless Chrome)
+MAX_PAGES = 55
+SCRAPE_WORKERS = 8  # Listing pages downloaded at once by the HTTP backend
+SELENIUM_TIMEOUT = 10  # Seconds to wait for a page's cards before giving up
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Coordinate validation (see find_suspect_coordinates())
+NYC_POLYGON = (  # Coarse (lat, lng) outline of the five boroughs, about 1 km accurate
+    (40.700, -74.030), (40.750, -74.020), (40.800, -73.985), (40.850, -73.955), (40.900, -73.925),
+    (40.915, -73.915), (40.910, -73.870), (40.895, -73.830), (40.885, -73.780), (40.850, -73.760),
+    (40.800, -73.765), (40.770, -73.700), (40.725, -73.700), (40.680, -73.725), (40.640, -73.735),
+    (40.595, -73.735), (40.580, -73.750), (40.540, -73.950), (40.565, -74.020), (40.590, -74.055),
+    (40.530, -74.120), (40.490, -74.255), (40.510, -74.265), (40.560, -74.225), (40.630, -74.205),
+    (40.650, -74.180), (40.648, -74.070), (40.660, -74.055), (40.690, -74.040),
+)
+NYC_CENTER = (40.7128, -74.0060)
+OUTLIER_DISTANCE_M = 3000  # Flag restaurants at least this far from their neighborhood's median location...
+OUTLIER_SPREAD_FACTOR = 4  # ...and this many times the neighborhood's median distance from it
+OUTLIER_MIN_NEIGHBORS = 3  # Neighborhoods with fewer located restaurants have no reliable median
+
+# Compact restaurants.json format (see compact_restaurants())
+DICTIONARY_COLUMNS = ("Cuisine", "Neighborhood")  # Stored as indexes into a shared string table
+COORDINATE_COLUMNS = ("Latitude", "Longitude")  # Stored as integers
+COORDINATE_SCALE = 10**6  # 6 decimal places, about 0.1 m
+NAME_NGRAM = 3  # Substring length indexed for the map's name search
+
+# Map rendering (see build_cluster_index() and generate_html_map())
+RENDER_MODE = "auto"  # "markers", "canvas" (circle markers), "clusters" or "auto"
+RENDER_MODES = ("markers", "canvas", "clusters", "auto")
+CLUSTER_AUTO_THRESHOLD = 2000  # "auto" switches from markers to clusters above this many restaurants
+CLUSTER_MIN_ZOOM = 10
+CLUSTER_MAX_ZOOM = 16  # Zoomed in further, the map draws every restaurant
+CLUSTER_RADIUS = 60  # Cluster cell width in screen pixels
+TILE_PRECISION = 5  # Geohash length of the map's data tiles (5 = about 5 x 5 km)
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Libraries the map page loads from CDNs (inlined by generate_html_map(bundle=True))
+MAP_SCRIPTS = (
+    "https://unpkg.com/react@18/umd/react.production.min.js",
+    "https://unpkg.com/react-dom@18/umd/react-dom.production.min.js",
+    "https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.js",
+)
+MAP_STYLESHEETS = (
+    "https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.css",
+)
+
+# Listing page card selectors
+NAME_SELECTOR = "h3.CardHeading_headline__qu1q3"
+TAGLINE_SELECTOR = "div.PromotionCardGrid_taglines__qTyHJ"
+TAG_SELECTOR = "div.Tag_tag__cc4nK"
+
+# Runs in the browser: returns [{Restaurant, Cuisine, Neighborhood}, ...] for
+# every card, pairing each name with the tags inside its own card container.
+# Arguments are NAME_SELECTOR, TAGLINE_SELECTOR and TAG_SELECTOR.
+EXTRACT_CARDS_SCRIPT = """
+const [nameSelector, taglineSelector, tagSelector] = arguments;
+const text = el => (el.innerText || el.textContent || "").trim();
+return Array.from(document.querySelectorAll(nameSelector)).map(name => {
+    let tags = [];
+    for (let card = name.parentElement; card; card = card.parentElement) {
+        if (card.querySelectorAll(nameSelector).length > 1) break;
+        const tagline = card.querySelector(taglineSelector);
+        if (tagline) {
+            tags = Array.from(tagline.querySelectorAll(tagSelector)).map(text);
+            break;
+        }
+    }
+    return {Restaurant: text(name), Cuisine: tags[0] || "", Neighborhood: tags[1] || ""};
+});
+"""
+
+REVIEW_RULES_FILE = "review_rules.json"  # Corrections applied to every scrape (see load_review_rules())
+REVIEW_CHANGE_COLUMNS = ["Restaurant", "Column", "Before", "After", "Rule"]
+
+CACHE_FILE = "geocode_cache.sqlite"  # Set to None to always call the APIs
+CACHE_TTL_DAYS = 180  # Restaurants rarely move between seasons
+NEGATIVE_CACHE_TTL_DAYS = 14  # Retry "not found" lookups sooner
+
+MAX_WORKERS = 8  # Concurrent API requests (1 = one at a time)
+REQUESTS_PER_SECOND = 10  # Keep at or below your Google API QPS quota
+STREAM_QUEUE_SIZE = 100  # Rows buffered between streaming stages before the earlier stage waits
+
+MAX_RETRIES = 5  # Retries for transient API errors before giving up on a row
+BACKOFF_MAX_SECONDS = 30
+# Base backoff delay (seconds) per Google API status; doubles on every retry
+RETRY_BACKOFF_SECONDS = {
+    "OVER_QUERY_LIMIT": 2.0,
+    "UNKNOWN_ERROR": 0.5,
+    "HTTP_ERROR": 0.5,
+}
+
+# ============================================================================
+# API LOOKUP CACHE
+# ============================================================================
+
+def normalize_query(text):
+    """Normalize a lookup string so trivial differences share a cache entry."""
+    
+    return " ".join(str(text).lower().replace(",", " , ").split())
+
+
+class GeocodeCache:
+    """Persistent SQLite cache for Places and Geocoding API lookups.
+    
+    Entries are keyed by lookup kind ("place" or "geocode") and a normalized
+    query. Lookups that returned no results are cached as well, but expire
+    after NEGATIVE_CACHE_TTL_DAYS instead of CACHE_TTL_DAYS.
+    """
+    
+    def __init__(self, path=CACHE_FILE, ttl_days=CACHE_TTL_DAYS,
+                 negative_ttl_days=NEGATIVE_CACHE_TTL_DAYS):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.negative_ttl = negative_ttl_days * 86400
+        self.hits = {}
+        self.misses = {}
+        self.lock = threading.Lock()
+        
+        # WAL mode and a busy timeout let several pipeline processes share one cache file
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS lookups ("
+            " kind TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT,"
+            " created_at REAL NOT NULL,"
+            " PRIMARY KEY (kind, key))"
+        )
+        self.conn.commit()
+    
+    def get(self, kind, query):
+        """Return (found, value) for a cached lookup that hasn't expired."""
+        
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, created_at FROM lookups WHERE kind = ? AND key = ?",
+                (kind, normalize_query(query))
+            ).fetchone()
+            
+            if row is not None:
+                value = json.loads(row[0]) if row[0] is not None else None
+                ttl = self.ttl if value is not None else self.negative_ttl
+                if time.time() - row[1] < ttl:
+                    self.hits[kind] = self.hits.get(kind, 0) + 1
+                    return True, value
+            
+            self.misses[kind] = self.misses.get(kind, 0) + 1
+            return False, None
+    
+    def set(self, kind, query, value):
+        """Store a lookup result. A value of None records a negative result."""
+        
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO lookups (kind, key, value, created_at) VALUES (?, ?, ?, ?)",
+                (kind, normalize_query(query),
+                 json.dumps(value) if value is not None else None, time.time())
+            )
+            self.conn.commit()
+    
+    def report(self, kind):
+        """Print hit/miss counts for one lookup kind."""
+        
+        hits = self.hits.get(kind, 0)
+        misses = self.misses.get(kind, 0)
+        print(f"✓ Cache: {hits} hits, {misses} misses ({self.path})")
+    
+    def close(self):
+        self.conn.close()
+
+
+# ============================================================================
+# CONCURRENT API REQUESTS
+# ============================================================================
+
+class TokenBucket:
+    """Thread-safe token bucket that keeps requests under a QPS quota.
+    
+    Up to `capacity` requests (by default `rate`, and at least one) can go
+    out in a burst; after that, callers block in acquire() until tokens
+    refill at `rate` per second.
+    """
+    
+    def __init__(self, rate=REQUESTS_PER_SECOND, capacity=None):
+        if rate <= 0:
+            raise ValueError(f"Request rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a request may be sent."""
+        
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SharedTokenBucket(TokenBucket):
+    """TokenBucket whose state lives in shared memory, so several processes share one quota.
+    
+    Create it in the parent process and hand it to the worker processes
+    when they start (e.g. as a multiprocessing.Pool initializer argument).
+    """
+    
+    def __init__(self, rate=REQUESTS_PER_SECOND, capacity=None):
+        if rate <= 0:
+            raise ValueError(f"Request rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.state = multiprocessing.RawArray("d", [self.capacity, time.monotonic()])
+        self.lock = multiprocessing.Lock()
+    
+    @property
+    def tokens(self):
+        return self.state[0]
+    
+    @tokens.setter
+    def tokens(self, value):
+        self.state[0] = value
+    
+    @property
+    def updated(self):
+        return self.state[1]
+    
+    @updated.setter
+    def updated(self, value):
+        self.state[1] = value
+
+
+SHARED_LIMITER = None  # Set to a SharedTokenBucket to throttle every API stage in this process with it
+
+
+def rate_limiter(qps=REQUESTS_PER_SECOND):
+    """The limiter for one API stage: SHARED_LIMITER if set, otherwise a new TokenBucket(qps)."""
+    
+    return SHARED_LIMITER if SHARED_LIMITER is not None else TokenBucket(qps)
+
+
+def create_session(workers=MAX_WORKERS):
+    """Create a requests Session whose connection pool fits `workers` threads."""
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(workers, 1))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def run_concurrently(func, items, workers, describe):
+    """Apply `func` to every item on a thread pool, returning results in input order.
+    
+    `describe(item)` builds the progress line printed as each item finishes.
+    """
+    
+    total = len(items)
+    results = [None] * total
+    
+    if workers <= 1:
+        for i, item in enumerate(items):
+            print(f"  [{i+1}/{total}] {describe(item)}")
+            results[i] = func(item)
+        return results
+    
+    # Don't wait for queued work on Ctrl-C; finished rows are already journaled
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {executor.submit(func, item): i for i, item in enumerate(items)}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            results[i] = future.result()
+            print(f"  [{done}/{total}] {describe(items[i])}")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    return results
+
+
+def place_queries(df):
+    """Normalized Places query for each row, as used for deduplication."""
+    
+    return (df["Restaurant"].astype(str) + ", " + df["Neighborhood"].astype(str)).map(normalize_query)
+
+
+def resolve_unique(df, keys, columns, lookup, workers, describe):
+    """Run `lookup` once per distinct key and spread the results back over the rows.
+    
+    `keys` holds one normalized lookup key per row of `df`. Only the first
+    row with each key is looked up: `lookup((key, row))` gets the key and
+    that row as a namedtuple and returns a value (or tuple of values) for
+    `columns`. Returns a DataFrame with `columns`, aligned with `df`.
+    """
+    
+    is_first = ~keys.duplicated()
+    unique_keys = keys[is_first].to_numpy()
+    items = list(zip(unique_keys, df.loc[is_first].itertuples(index=False)))
+    
+    if len(df):
+        saved = 1 - len(unique_keys) / len(df)
+        print(f"✓ {len(df)} rows → {len(unique_keys)} unique lookups ({saved:.0%} deduplicated)")
+    
+    results = run_concurrently(lookup, items, workers, describe)
+    resolved = pd.DataFrame(results, index=unique_keys, columns=columns)
+    return resolved.reindex(keys.to_numpy()).set_axis(df.index)
+
+
+# ============================================================================
+# API RETRIES AND RESUMABLE CHECKPOINTS
+# ============================================================================
+
+class ApiError(Exception):
+    """A Google API request that failed after all retries, or can't succeed."""
+
+
+def request_json(url, params, session=None, limiter=None, max_retries=MAX_RETRIES):
+    """GET a Google API endpoint and return the JSON body.
+    
+    Connection errors, 429/5xx responses, unreadable bodies and the
+    OVER_QUERY_LIMIT / UNKNOWN_ERROR statuses are retried with exponential
+    backoff and full jitter, using the base delay for that status from
+    RETRY_BACKOFF_SECONDS. Other 4xx responses and error statuses
+    (REQUEST_DENIED, INVALID_REQUEST) raise ApiError immediately.
+    """
+    
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        
+        started = time.perf_counter()
+        response = None
+        try:
+            response = (session or requests).get(url, params=params, timeout=10)
+            METRICS.record_request(url, time.perf_counter() - started, response.status_code < 400)
+            if response.status_code == 429 or response.status_code >= 500:
+                reason = "HTTP_ERROR"
+                detail = f"HTTP {response.status_code}"
+            elif response.status_code >= 400:
+                raise ApiError(f"HTTP {response.status_code}: {response.reason}")
+            else:
+                body = response.json()
+                status = body.get("status", "OK")
+                if status not in RETRY_BACKOFF_SECONDS:
+                    if status not in ("OK", "ZERO_RESULTS"):
+                        raise ApiError(f"{status}: {body.get('error_message', '')}".rstrip(": "))
+                    return body
+                reason = detail = status
+        except requests.RequestException as e:
+            if response is None:  # No response at all (e.g. a timeout), so not recorded above
+                METRICS.record_request(url, time.perf_counter() - started, ok=False)
+            reason = "HTTP_ERROR"
+            detail = str(e)
+        
+        if attempt == max_retries:
+            break
+        
+        METRICS.record_retry(reason)
+        delay = min(BACKOFF_MAX_SECONDS, RETRY_BACKOFF_SECONDS[reason] * 2 ** attempt)
+        time.sleep(random.uniform(0, delay))
+    
+    raise ApiError(f"{detail} (gave up after {max_retries} retries)")
+
+
+class StageJournal:
+    """Append-only JSON Lines record of per-row results for one API stage.
+    
+    Each resolved row is flushed to disk as soon as it completes, so a run
+    that crashes or is interrupted can pick up where it stopped. Rows that
+    failed or weren't found (a None value, or a tuple ending in None) aren't
+    journaled and are looked up again.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        self.lock = threading.Lock()
+        
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Partial line from an interrupted write
+                    value = entry["value"]
+                    self.done[entry["key"]] = tuple(value) if isinstance(value, list) else value
+            if self.done:
+                print(f"↻ Resuming from {path}: {len(self.done)} rows already resolved")
+        
+        self.file = open(path, "a", encoding="utf-8")
+    
+    def run(self, key, func):
+        """Return the journaled result for `key`, or compute and journal it."""
+        
+        if key in self.done:
+            return self.done[key]
+        
+        value = func()
+        found = value[-1] if isinstance(value, tuple) else value
+        if found is not None:
+            with self.lock:
+                if not self.file.closed:
+                    self.file.write(json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n")
+                    self.file.flush()
+        
+        return value
+    
+    def close(self):
+        with self.lock:
+            self.file.close()
+    
+    def remove(self):
+        """Delete the journal once the stage's output has been written."""
+        
+        self.close()
+        os.remove(self.path)
+
+
+# ============================================================================
+# RUN METRICS
+# ============================================================================
+
+class RunMetrics:
+    """Timings and counters for one pipeline run, written out as a JSON report.
+    
+    Stages are timed with stage(); request_json() and the HTTP scraper
+    record every request and retry, and the writers record the size of
+    every file they produce. Safe to update from worker threads.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        self.started = time.time()
+        self.stages = []
+        self.latencies = {}  # Endpoint -> seconds per request
+        self.errors = {}
+        self.retries = {}
+        self.files = {}
+    
+    @contextmanager
+    def stage(self, name):
+        """Time the body as stage `name` (wall-clock and process CPU time).
+        
+        Yields the stage's record, so callers can add to it (e.g. "rows").
+        """
+        
+        record = {"name": name}
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_s"] = round(time.perf_counter() - wall, 3)
+            record["cpu_s"] = round(time.process_time() - cpu, 3)
+            with self.lock:
+                self.stages.append(record)
+    
+    def record_request(self, url, seconds, ok=True):
+        endpoint = urlsplit(url).path
+        with self.lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+    
+    def record_retry(self, reason):
+        with self.lock:
+            self.retries[reason] = self.retries.get(reason, 0) + 1
+    
+    def record_file(self, path):
+        with self.lock:
+            self.files[path] = os.path.getsize(path)
+    
+    def summary(self, cache=None):
+        """The run report as a dict."""
+        
+        http = {}
+        for endpoint, seconds in self.latencies.items():
+            p50, p90, p99 = np.percentile(np.array(seconds) * 1000, [50, 90, 99])
+            http[endpoint] = {
+                "requests": len(seconds),
+                "errors": self.errors.get(endpoint, 0),
+                "p50_ms": round(p50, 1),
+                "p90_ms": round(p90, 1),
+                "p99_ms": round(p99, 1),
+                "max_ms": round(max(seconds) * 1000, 1)
+            }
+        
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "wall_s": round(time.time() - self.started, 3),
+            "stages": self.stages,
+            "http": http,
+            "retries": self.retries,
+            "cache": {"hits": cache.hits, "misses": cache.misses} if cache is not None else None,
+            "files": self.files,
+            "bytes_written": sum(self.files.values())
+        }
+    
+    def write(self, output_file="run_report.json", cache=None):
+        """Print a per-stage summary and write the full report to `output_file`."""
+        
+        report = self.summary(cache)
+        print(f"\n⏱ {'Stage':<36} {'Wall':>9} {'CPU':>9}")
+        for stage in report["stages"]:
+            print(f"  {stage['name']:<36} {stage['wall_s']:>8.2f}s {stage['cpu_s']:>8.2f}s")
+        for endpoint, stats in report["http"].items():
+            print(f"  {endpoint}: {stats['requests']} requests, p50 {stats['p50_ms']} ms, p99 {stats['p99_ms']} ms")
+        
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Saved run report to: {output_file}")
+        return output_file
+
+
+METRICS = RunMetrics()  # Shared by every stage; run_pipeline() resets it
+
+
+# ============================================================================
+# STAGE INPUT AND OUTPUT
+# ============================================================================
+
+def read_csv(input_file):
+    """Read a stage's CSV input, keeping empty text cells as "" rather than NaN."""
+    
+    return pd.read_csv(input_file, keep_default_na=False, na_values={
+        column: [""] for column in ("Address", "Latitude", "Longitude")
+    })
+
+
+def write_csv(df, output_file):
+    """Write a stage's DataFrame to CSV and return the path."""
+    
+    df.to_csv(output_file, index=False)
+    METRICS.record_file(output_file)
+    print(f"✓ Saved {len(df)} rows to: {output_file}")
+    return output_file
+
+
 # ============================================================================
 # STEP 1: WEB SCRAPING
 # ============================================================================
 
-def scrape_restaurant_week():
-    """Scrape restaurant data from NYC Tourism website."""
+def parse_restaurant_cards(html):
+    """Parse restaurant name, cuisine and neighborhood from a listing page's HTML.
+    
+    Each name is paired with the tags inside its own card, found by walking
+    up from the heading until an element contains a tag line. See
+    EXTRACT_CARDS_SCRIPT for the same logic in the browser.
+    """
+    
+    soup = BeautifulSoup(html, HTML_PARSER)
+    
+    restaurants = []
+    for name in soup.select(NAME_SELECTOR):
+        tags = []
+        for card in name.parents:
+            if len(card.select(NAME_SELECTOR)) > 1:
+                break  # Reached the grid holding other cards
+            tagline = card.select_one(TAGLINE_SELECTOR)
+            if tagline is not None:
+                tags = tagline.select(TAG_SELECTOR)
+                break
+        
+        restaurants.append({
+            'Restaurant': name.get_text(strip=True),
+            'Cuisine': tags[0].get_text(strip=True) if len(tags) >= 1 else "",
+            'Neighborhood': tags[1].get_text(strip=True) if len(tags) >= 2 else ""
+        })
+    
+    return restaurants
+
+
+def next_page_url(html, current_url):
+    """Return the URL behind the listing's "next" link, or None on the last page.
+    
+    Raises RuntimeError if the link only works through JavaScript, since the
+    remaining pages can't be reached without a browser.
+    """
+    
+    soup = BeautifulSoup(html, HTML_PARSER)
+    next_link = soup.select_one("li.next a")
+    if next_link is None or "disabled" in (next_link.parent.get("class") or []):
+        return None
+    if not next_link.get("href"):
+        raise RuntimeError("the \"next\" link has no URL (client-side pagination)")
+    return urljoin(current_url, next_link["href"])
+
+
+def discover_page_urls(html, current_url, max_pages=MAX_PAGES):
+    """Work out every listing page's URL from the first page's pagination links.
+    
+    The page count is the highest page number in the pagination list, and
+    the URL scheme comes from the query parameter the "next" link sets to 2.
+    Returns the URLs of pages 2..N, or None if either can't be determined.
+    """
+    
+    soup = BeautifulSoup(html, HTML_PARSER)
+    next_link = soup.select_one("li.next a")
+    if next_link is None or not next_link.get("href") or next_link.find_parent("ul") is None:
+        return None
+    
+    numbers = [
+        int(link.get_text(strip=True))
+        for link in next_link.find_parent("ul").select("li a")
+        if link.get_text(strip=True).isdigit()
+    ]
+    if not numbers:
+        return None
+    page_count = min(max(numbers), max_pages)
+    
+    parts = urlsplit(urljoin(current_url, next_link["href"]))
+    query = parse_qsl(parts.query)
+    page_params = [key for key, value in query if value == "2"]
+    if not page_params:
+        return None
+    
+    return [
+        urlunsplit(parts._replace(query=urlencode(
+            [(key, str(page) if key == page_params[0] else value) for key, value in query]
+        )))
+        for page in range(2, page_count + 1)
+    ]
+
+
+def fetch_listing_page(session, url):
+    """Download one listing page and return its HTML."""
+    
+    started = time.perf_counter()
+    try:
+        response = session.get(url, timeout=30)
+    except requests.RequestException:
+        METRICS.record_request(url, time.perf_counter() - started, ok=False)
+        raise
+    METRICS.record_request(url, time.perf_counter() - started, response.ok)
+    response.raise_for_status()
+    return response.text
+
+
+def iter_listing_pages(base_url=BASE_URL, max_pages=MAX_PAGES, workers=SCRAPE_WORKERS):
+    """Download the listing over plain HTTP, yielding (page number, HTML) as each page arrives.
+    
+    When the page URLs can be worked out from the first page, the rest are
+    downloaded on `workers` threads and yielded in the order they finish;
+    otherwise the "next" links are followed one by one. Either way, the
+    "next" links are followed on from the last page fetched, in case the
+    pagination list only showed some of the pages.
+    """
+    
+    if BeautifulSoup is None:
+        raise RuntimeError("The 'http' scraper backend needs beautifulsoup4 (pip install beautifulsoup4)")
+    
+    session = create_session(workers)
+    session.headers["User-Agent"] = USER_AGENT
+    
+    with session:
+        page, html, url = 1, fetch_listing_page(session, base_url), base_url
+        yield page, html
+        page_urls = discover_page_urls(html, base_url, max_pages) if workers > 1 else None
+        
+        if page_urls:
+            print(f"\nFetching {len(page_urls) + 1} pages with {workers} workers...")
+            executor = ThreadPoolExecutor(max_workers=workers)
+            try:
+                futures = {
+                    executor.submit(fetch_listing_page, session, url): page
+                    for page, url in enumerate(page_urls, 2)
+                }
+                for future in as_completed(futures):
+                    if futures[future] == len(page_urls) + 1:
+                        html = future.result()
+                    yield futures[future], future.result()
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+            page, url = len(page_urls) + 1, page_urls[-1]
+        
+        url = next_page_url(html, url)
+        if page_urls and url and page < max_pages:
+            print(f"  ⚠ The pagination only listed {page} pages; following the \"next\" links for the rest")
+        while url and page < max_pages:
+            html = fetch_listing_page(session, url)
+            page += 1
+            yield page, html
+            url = next_page_url(html, url)
+
+
+def scrape_with_http(base_url=BASE_URL, max_pages=MAX_PAGES, workers=SCRAPE_WORKERS):
+    """Scrape the listing over plain HTTP, without starting a browser.
+    
+    The site is server-rendered, so every page's cards are in the initial
+    HTML and can be parsed directly. Pages are downloaded by
+    iter_listing_pages() and merged in page order. Returns a list of
+    restaurant dicts.
+    """
+    
+    pages = dict(iter_listing_pages(base_url, max_pages, workers))
+    
+    all_restaurants = []
+    for page_count in sorted(pages):
+        print(f"\nPage {page_count}/{len(pages)}")
+        
+        restaurants = parse_restaurant_cards(pages[page_count])
+        print(f"Found {len(restaurants)} restaurants on this page")
+        
+        for i, restaurant in enumerate(restaurants):
+            print(f"  {i+1}. {restaurant['Restaurant']} | {restaurant['Cuisine']} | {restaurant['Neighborhood']}")
+        all_restaurants.extend(restaurants)
+    
+    return all_restaurants
+
+
+class card_count_stable:
+    """Wait condition: the page has cards and their count didn't change since the last poll."""
+    
+    def __init__(self, selector):
+        self.selector = selector
+        self.last_count = -1
+    
+    def __call__(self, driver):
+        count = len(driver.find_elements(By.CSS_SELECTOR, self.selector))
+        stable = count > 0 and count == self.last_count
+        self.last_count = count
+        return stable
+
+
+def card_tags_loaded(driver):
+    """Wait condition: every card's tag line has its lazy-loaded tags."""
+    
+    return driver.execute_script(
+        "const taglines = document.querySelectorAll(arguments[0]);"
+        "return taglines.length > 0 &&"
+        "  Array.from(taglines).every(t => t.querySelector(arguments[1]) !== null);",
+        TAGLINE_SELECTOR, TAG_SELECTOR
+    )
+
+
+def scrape_with_selenium(base_url=BASE_URL, max_pages=MAX_PAGES):
+    """Scrape the listing with headless Chrome, clicking through the pages.
+    
+    Instead of fixed sleeps, each page waits for its cards to stop loading
+    and for their tags to appear, and pagination waits for the old cards
+    to go stale. Returns a list of restaurant dicts.
+    """
     
-    base_url = "https://www.nyctourism.com/restaurant-week/"
     all_restaurants = []
     
     # Set up Chrome options
@@ -43,89 +836,65 @@ def scrape_restaurant_week():
     chrome_options.add_argument("--headless")  # Run without browser window
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    chrome_options.add_argument(f"user-agent={USER_AGENT}")
     
-    print("=" * 80)
-    print("STEP 1: WEB SCRAPING")
-    print("=" * 80)
     print("\nInitializing browser...")
     
     # Initialize the driver
     driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
     driver.maximize_window()
+    wait = WebDriverWait(driver, SELENIUM_TIMEOUT, poll_frequency=0.25)
+    total_wait = 0.0
+    total_parse = 0.0
     
     try:
         page_count = 0
-        max_pages = 55
         
         # Start at the main page
         driver.get(base_url)
-        time.sleep(3)
         
         while page_count < max_pages:
             page_count += 1
             print(f"\nPage {page_count}/{max_pages}")
             
-            # Handle lazy loading by scrolling
-            for scroll_step in range(5):
-                driver.execute_script(f"window.scrollTo(0, {(scroll_step + 1) * 500});")
-                time.sleep(0.3)
-            
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1)
-            driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(1)
-            
-            # Wait for restaurant cards to load
+            # Scroll to the bottom to trigger lazy loading, then wait for the
+            # cards to settle and their tags to load
+            wait_start = time.time()
             try:
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "h3.CardHeading_headline__qu1q3"))
-                )
-            except:
+                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, NAME_SELECTOR)))
+            except TimeoutException:
                 print("  ⚠ Timeout waiting for restaurant cards")
                 break
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            try:
+                wait.until(card_count_stable(NAME_SELECTOR))
+                wait.until(card_tags_loaded)
+            except TimeoutException:
+                # Cards without tags just get an empty cuisine or neighborhood
+                print("  ⚠ Timeout waiting for the cards to finish loading; extracting what's there")
+            wait_time = time.time() - wait_start
             
-            # Find all restaurant names and tags
-            restaurant_names = driver.find_elements(By.CSS_SELECTOR, "h3.CardHeading_headline__qu1q3")
-            tag_containers = driver.find_elements(By.CSS_SELECTOR, "div.PromotionCardGrid_taglines__qTyHJ")
+            # Extract every card in one round-trip to the browser
+            parse_start = time.time()
+            restaurants = driver.execute_script(
+                EXTRACT_CARDS_SCRIPT, NAME_SELECTOR, TAGLINE_SELECTOR, TAG_SELECTOR
+            )
             
-            num_restaurants = len(restaurant_names)
+            num_restaurants = len(restaurants)
             print(f"Found {num_restaurants} restaurants on this page")
             
             if num_restaurants == 0:
                 break
             
-            # Process each restaurant
-            for i in range(num_restaurants):
-                try:
-                    restaurant_name = restaurant_names[i].text.strip()
-                    cuisine = ""
-                    neighborhood = ""
-                    
-                    if i < len(tag_containers):
-                        tags = tag_containers[i].find_elements(By.CSS_SELECTOR, "div.Tag_tag__cc4nK")
-                        if len(tags) >= 1:
-                            cuisine = tags[0].text.strip()
-                        if len(tags) >= 2:
-                            neighborhood = tags[1].text.strip()
-                    
-                    all_restaurants.append({
-                        'Restaurant': restaurant_name,
-                        'Cuisine': cuisine,
-                        'Neighborhood': neighborhood
-                    })
-                    
-                    print(f"  {i+1}. {restaurant_name} | {cuisine} | {neighborhood}")
-                    
-                except Exception as e:
-                    print(f"  ✗ Error processing restaurant {i+1}: {str(e)[:50]}")
-                    continue
+            for i, restaurant in enumerate(restaurants):
+                print(f"  {i+1}. {restaurant['Restaurant']} | {restaurant['Cuisine']} | {restaurant['Neighborhood']}")
+            all_restaurants.extend(restaurants)
+            parse_time = time.time() - parse_start
             
             # Move to next page
+            wait_start = time.time()
             try:
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(1)
-                
+                first_card = driver.find_element(By.CSS_SELECTOR, NAME_SELECTOR)
                 next_button = driver.find_element(By.CSS_SELECTOR, "li.next a")
                 parent_li = next_button.find_element(By.XPATH, "..")
                 parent_classes = parent_li.get_attribute("class") or ""
@@ -135,231 +904,1518 @@ def scrape_restaurant_week():
                     break
                 
                 driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", next_button)
-                time.sleep(0.5)
+                wait.until(EC.element_to_be_clickable(next_button))
                 
                 try:
                     next_button.click()
-                except:
+                except Exception:
                     driver.execute_script("arguments[0].click();", next_button)
                 
-                time.sleep(3)
+                # The page has changed once the previous cards are detached
+                wait.until(EC.staleness_of(first_card))
                 
             except Exception as e:
                 print(f"\n  ℹ Reached the end")
                 break
+            finally:
+                wait_time += time.time() - wait_start
+                total_wait += wait_time
+                total_parse += parse_time
+                print(f"  ⏱ Waited {wait_time:.1f}s, parsed {parse_time:.1f}s")
         
     finally:
-        driver.quit()
+        driver.quit()
+    
+    print(f"\n⏱ Total: waited {total_wait:.1f}s, parsed {total_parse:.1f}s")
+    return all_restaurants
+
+
+def scrape_restaurants(backend=SCRAPER_BACKEND, base_url=BASE_URL, max_pages=MAX_PAGES,
+                       workers=SCRAPE_WORKERS):
+    """Scrape restaurant data from NYC Tourism website into a DataFrame.
+    
+    `backend` is "http" (plain requests + HTML parsing, no browser) or
+    "selenium" (headless Chrome). If the HTTP backend can't be used or finds
+    no restaurants, the pipeline falls back to Selenium.
+    """
+    
+    print("=" * 80)
+    print("STEP 1: WEB SCRAPING")
+    print("=" * 80)
+    
+    all_restaurants = []
+    if backend == "http":
+        try:
+            all_restaurants = scrape_with_http(base_url, max_pages, workers)
+        except Exception as e:
+            print(f"\n⚠ HTTP scraper failed: {e}")
+        if not all_restaurants:
+            print("\n⚠ No restaurants found over HTTP, falling back to Selenium")
+            backend = "selenium"
+    
+    if backend == "selenium":
+        all_restaurants = scrape_with_selenium(base_url, max_pages)
+    elif backend != "http":
+        raise ValueError(f"Unknown scraper backend: {backend!r} (use 'http' or 'selenium')")
+    
+    print(f"\n✓ Scraped {len(all_restaurants)} restaurants")
+    return pd.DataFrame(all_restaurants, columns=['Restaurant', 'Cuisine', 'Neighborhood'])
+
+
+def scrape_restaurant_week(backend=SCRAPER_BACKEND, base_url=BASE_URL, max_pages=MAX_PAGES,
+                           workers=SCRAPE_WORKERS):
+    """Scrape restaurant data from NYC Tourism website into 'nyc_restaurant_week.csv'."""
+    
+    return write_csv(scrape_restaurants(backend, base_url, max_pages, workers), 'nyc_restaurant_week.csv')
+
+
+# ============================================================================
+# STEP 1.5: REVIEW THE SCRAPED DATA
+# ============================================================================
+
+def load_review_rules(rules_file=REVIEW_RULES_FILE):
+    """Read the corrections file, or return None if there isn't one.
+    
+    The file is JSON with a "version" and any of these rules, applied in
+    this order by apply_review_rules():
+    
+        "normalize": [{"column": ..., "pattern": ..., "replacement": ...}]
+            regex substitutions (Python syntax) on a column
+        "names": {"scraped name": "corrected name"}
+        "fixes": {"restaurant": {"Cuisine": ..., "Neighborhood": ...}}
+            values to replace for a restaurant
+        "drop": ["restaurant", ...]
+    
+    Restaurant names are matched ignoring case and extra whitespace;
+    "fixes" and "drop" use the names after the "names" overrides.
+    """
+    
+    if not rules_file or not os.path.exists(rules_file):
+        return None
+    
+    with open(rules_file, encoding="utf-8") as f:
+        rules = json.load(f)
+    
+    # Fail now rather than halfway through a run
+    unknown = set(rules) - {"version", "description", "normalize", "names", "fixes", "drop"}
+    if unknown:
+        raise ValueError(f"Unknown review rules in {rules_file}: {', '.join(sorted(unknown))}")
+    for rule in rules.get("normalize", []):
+        if rule["column"] not in ("Restaurant", "Cuisine", "Neighborhood"):
+            raise ValueError(f"Can't normalize column {rule['column']!r} in {rules_file}")
+        re.compile(rule["pattern"])
+    for restaurant, fix in rules.get("fixes", {}).items():
+        if not set(fix) <= {"Cuisine", "Neighborhood"}:
+            raise ValueError(f"Fixes for {restaurant!r} in {rules_file} can only set Cuisine and Neighborhood")
+    
+    return rules
+
+
+def review_keys(names):
+    """Case- and whitespace-insensitive match keys for a Series of restaurant names."""
+    
+    return names.fillna("").astype(str).str.split().str.join(" ").str.casefold()
+
+
+def apply_review_rules(df, rules):
+    """Apply the corrections in `rules` (see load_review_rules()) to a copy of `df`.
+    
+    Returns the corrected DataFrame and a DataFrame of changes with
+    Restaurant, Column, Before, After and Rule columns (dropped rows have
+    an empty Column and After).
+    """
+    
+    df = df.copy()
+    changes = []
+    
+    def record(rule, before, columns):
+        for column in columns:
+            changed = before[column].fillna("").astype(str) != df[column].fillna("").astype(str)
+            changes.append(pd.DataFrame({
+                "Restaurant": before.loc[changed, "Restaurant"],
+                "Column": column,
+                "Before": before.loc[changed, column],
+                "After": df.loc[changed, column],
+                "Rule": rule
+            }))
+    
+    for rule in rules.get("normalize", []):
+        before = df.copy()
+        column = rule["column"]
+        df[column] = df[column].fillna("").astype(str).str.replace(rule["pattern"], rule["replacement"], regex=True)
+        record("normalize", before, [column])
+    
+    names = rules.get("names", {})
+    if names:
+        before = df.copy()
+        overrides = pd.Series(list(names.values()), index=review_keys(pd.Series(list(names))))
+        df["Restaurant"] = review_keys(df["Restaurant"]).map(overrides).fillna(df["Restaurant"])
+        record("names", before, ["Restaurant"])
+    
+    fixes = rules.get("fixes", {})
+    if fixes:
+        before = df.copy()
+        table = pd.DataFrame.from_dict(fixes, orient="index")
+        table.index = review_keys(pd.Series(table.index))
+        keys = review_keys(df["Restaurant"])
+        for column in table.columns:
+            df[column] = keys.map(table[column].dropna()).fillna(df[column])
+        record("fixes", before, list(table.columns))
+    
+    drop = rules.get("drop", [])
+    if drop:
+        dropped = review_keys(df["Restaurant"]).isin(review_keys(pd.Series(drop)))
+        changes.append(pd.DataFrame({
+            "Restaurant": df.loc[dropped, "Restaurant"],
+            "Column": "",
+            "Before": df.loc[dropped, "Restaurant"],
+            "After": "",
+            "Rule": "drop"
+        }))
+        df = df[~dropped].reset_index(drop=True)
+    
+    changes = [change for change in changes if not change.empty]
+    return df, pd.concat(changes, ignore_index=True) if changes else pd.DataFrame(columns=REVIEW_CHANGE_COLUMNS)
+
+
+def print_review_changes(changes, changes_file="review_changes.csv"):
+    """Print the changes made by apply_review_rules() and list them in `changes_file`."""
+    
+    for change in changes.itertuples(index=False):
+        if change.Rule == "drop":
+            print(f"  - {change.Restaurant}: dropped")
+        else:
+            print(f"  - {change.Restaurant}: {change.Column} '{change.Before}' → '{change.After}' ({change.Rule})")
+    
+    if len(changes):
+        counts = ", ".join(f"{count} {rule}" for rule, count in changes["Rule"].value_counts().items())
+        print(f"✓ {len(changes)} changes ({counts})")
+        changes.to_csv(changes_file, index=False)
+        METRICS.record_file(changes_file)
+        print(f"✓ Saved the list of changes to: {changes_file}")
+    else:
+        print("✓ No changes needed")
+        if os.path.exists(changes_file):
+            os.remove(changes_file)
+
+
+def review_restaurants(df, rules_file=REVIEW_RULES_FILE, changes_file="review_changes.csv"):
+    """Return a copy of the scraped `df` with the corrections file applied.
+    
+    Every change is printed and listed in `changes_file`, and rows that
+    still look wrong (a cuisine that's really a neighborhood, or an empty
+    name or neighborhood) are flagged so the rules can be extended.
+    Without a corrections file the data passes through unchanged.
+    """
+    
+    print("\n" + "=" * 80)
+    print("STEP 1.5: REVIEWING SCRAPED DATA")
+    print("=" * 80)
+    
+    rules = load_review_rules(rules_file)
+    if rules is None:
+        print(f"ℹ No review rules at '{rules_file}', keeping the data as scraped")
+    else:
+        print(f"✓ Applying review rules version {rules.get('version', '?')} from '{rules_file}'")
+        df, changes = apply_review_rules(df, rules)
+        print_review_changes(changes, changes_file)
+    
+    neighborhoods = df["Neighborhood"].fillna("").astype(str).str.strip()
+    misplaced = df["Cuisine"].isin(neighborhoods[neighborhoods != ""])
+    empty = (df["Restaurant"].fillna("").astype(str).str.strip() == "") | (neighborhoods == "")
+    for row in df[misplaced | empty].itertuples(index=False):
+        print(f"  ⚠ Check {row.Restaurant!r}: cuisine {row.Cuisine!r}, neighborhood {row.Neighborhood!r}")
+    if (misplaced | empty).any():
+        print(f"⚠ {(misplaced | empty).sum()} rows may need a fix in '{rules_file}'")
+    
+    return df
+
+
+def manual_review_checkpoint(csv_file):
+    """Pause for manual data review and correction."""
+    
+    print("\n" + "=" * 80)
+    print("MANUAL REVIEW CHECKPOINT")
+    print("=" * 80)
+    print(f"\nScraping complete! The data has been saved to '{csv_file}'")
+    print("\nBefore continuing with API calls, please review the data for any issues.")
+    print("\nSteps:")
+    print(f"  1. Open '{csv_file}' in Excel or a text editor")
+    print("  2. Review and fix any issues you find")
+    print("  3. Save the file")
+    print("  4. Return here and press Enter to continue")
+    
+    input("\nPress Enter when ready to continue the pipeline...")
+    
+    print("✓ Continuing pipeline...")
+    
+    return csv_file
+
+
+# ============================================================================
+# STEP 2: APPEND ", NEW YORK, NY" TO NEIGHBORHOODS
+# ============================================================================
+
+def append_city(df, city_suffix=CITY_SUFFIX):
+    """Return a copy of `df` with `city_suffix` (', New York, NY') appended to every neighborhood.
+    
+    Missing neighborhoods become just 'New York, NY' rather than 'nan, New York, NY'.
+    """
+    
+    print("\n" + "=" * 80)
+    print("STEP 2: APPENDING CITY TO NEIGHBORHOODS")
+    print("=" * 80)
+    
+    df = df.copy()
+    neighborhoods = df["Neighborhood"].fillna("").astype(str).str.strip()
+    df["Neighborhood"] = (neighborhoods + city_suffix).str.removeprefix(", ")
+    
+    print(f"✓ Appended '{city_suffix}' to {len(df)} neighborhoods")
+    
+    return df
+
+
+def append_city_to_neighborhoods(input_file, city_suffix=CITY_SUFFIX):
+    """Append ', New York, NY' to all neighborhood values (CSV in, CSV out)."""
+    
+    return write_csv(append_city(read_csv(input_file), city_suffix), "nyc_restaurants_nyc.csv")
+
+
+# ============================================================================
+# STEP 3: FETCH ADDRESSES VIA GOOGLE PLACES API
+# ============================================================================
+
+def get_place(restaurant, neighborhood, api_key, cache=None, session=None, limiter=None):
+    """Get address and location for a restaurant from one Google Places API call.
+    
+    Returns a dict with "address", "lat" and "lng" (lat/lng are None if the
+    result has no geometry), or None if the restaurant wasn't found.
+    """
+    
+    query = f"{restaurant}, {neighborhood}"
+    
+    if cache is not None:
+        found, place = cache.get("place", query)
+        # Caches from before the fused lookup hold just the address string; look those up again
+        if found and (place is None or isinstance(place, dict)):
+            return place
+    
+    url = PLACES_URL
+    params = {
+        "query": query,
+        "key": api_key
+    }
+    
+    try:
+        response = request_json(url, params, session, limiter)
+        if response["results"]:
+            result = response["results"][0]
+            location = result.get("geometry", {}).get("location", {})
+            place = {
+                "address": result["formatted_address"],
+                "lat": location.get("lat"),
+                "lng": location.get("lng")
+            }
+            if cache is not None:
+                cache.set("place", query, place)
+            return place
+        if response.get("status") == "ZERO_RESULTS" and cache is not None:
+            cache.set("place", query, None)
+    except Exception as e:
+        print(f"  ✗ Error fetching address for {restaurant}: {e}")
+    
+    return None
+
+
+def get_address(restaurant, neighborhood, api_key, cache=None, session=None, limiter=None):
+    """Get address for a restaurant using Google Places API."""
+    
+    place = get_place(restaurant, neighborhood, api_key, cache, session, limiter)
+    return place["address"] if place else None
+
+
+def lookup_addresses(df, api_key, cache=None, workers=MAX_WORKERS, qps=REQUESTS_PER_SECOND,
+                     journal_file="restaurants_with_addresses.journal"):
+    """Return a copy of `df` with an Address column from the Google Places API.
+    
+    Requests run on `workers` threads sharing one pooled HTTP session and
+    are throttled to `qps` requests per second. Results are journaled to
+    `journal_file` until the stage completes.
+    """
+    
+    print("\n" + "=" * 80)
+    print("STEP 3: FETCHING ADDRESSES VIA GOOGLE PLACES API")
+    print("=" * 80)
+    
+    df = df.copy()
+    total = len(df)
+    
+    session = create_session(workers)
+    limiter = rate_limiter(qps)
+    journal = StageJournal(journal_file)
+    
+    start = time.time()
+    try:
+        with session:
+            resolved = resolve_unique(
+                df, place_queries(df), ["Address"],
+                lambda item: journal.run(item[0], lambda: get_address(
+                    item[1].Restaurant, item[1].Neighborhood, api_key, cache, session, limiter
+                )),
+                workers,
+                lambda item: f"Fetched address for: {item[1].Restaurant}"
+            )
+    finally:
+        journal.close()
+    
+    df["Address"] = resolved["Address"]
+    journal.remove()
+    
+    successful = df["Address"].notna().sum()
+    print(f"\n✓ Fetched {successful}/{total} addresses successfully in {time.time() - start:.1f}s")
+    if cache is not None:
+        cache.report("place")
+    
+    return df
+
+
+def fetch_addresses(input_file, api_key, cache=None, workers=MAX_WORKERS, qps=REQUESTS_PER_SECOND):
+    """Fetch addresses for all restaurants (CSV in, CSV out)."""
+    
+    df = lookup_addresses(read_csv(input_file), api_key, cache, workers, qps)
+    return write_csv(df, "restaurants_with_addresses.csv")
+
+
+# ============================================================================
+# STEP 4: FETCH COORDINATES VIA GOOGLE GEOCODING API
+# ============================================================================
+
+def get_coordinates(address, api_key, cache=None, session=None, limiter=None):
+    """Get latitude and longitude for an address using Google Geocoding API."""
+    
+    if pd.isna(address) or not address:
+        return None, None
+    
+    if cache is not None:
+        found, location = cache.get("geocode", address)
+        if found:
+            return tuple(location) if location else (None, None)
+    
+    url = GEOCODE_URL
+    params = {
+        "address": address,
+        "key": api_key
+    }
+    
+    try:
+        response = request_json(url, params, session, limiter)
+        if response["results"]:
+            location = response["results"][0]["geometry"]["location"]
+            if cache is not None:
+                cache.set("geocode", address, [location["lat"], location["lng"]])
+            return location["lat"], location["lng"]
+        if response.get("status") == "ZERO_RESULTS" and cache is not None:
+            cache.set("geocode", address, None)
+    except Exception as e:
+        print(f"  ✗ Error fetching coordinates for {address}: {e}")
+    
+    return None, None
+
+
+def lookup_coordinates(df, api_key, cache=None, workers=MAX_WORKERS, qps=REQUESTS_PER_SECOND,
+                       journal_file="restaurants_with_coordinates.journal"):
+    """Return a copy of `df` with Latitude/Longitude from the Google Geocoding API.
+    
+    Uses the same thread pool, rate limiting and journaling as lookup_addresses().
+    """
+    
+    print("\n" + "=" * 80)
+    print("STEP 4: FETCHING COORDINATES VIA GOOGLE GEOCODING API")
+    print("=" * 80)
+    
+    df = df.copy()
+    total = len(df)
+    
+    session = create_session(workers)
+    limiter = rate_limiter(qps)
+    journal = StageJournal(journal_file)
+    
+    start = time.time()
+    try:
+        with session:
+            resolved = resolve_unique(
+                df, df["Address"].fillna("").astype(str).map(normalize_query), ["Latitude", "Longitude"],
+                lambda item: journal.run(item[0], lambda: get_coordinates(
+                    item[1].Address, api_key, cache, session, limiter
+                )),
+                workers,
+                lambda item: f"Fetched coordinates for: {item[1].Restaurant}"
+            )
+    finally:
+        journal.close()
+    
+    df["Latitude"] = pd.to_numeric(resolved["Latitude"])
+    df["Longitude"] = pd.to_numeric(resolved["Longitude"])
+    journal.remove()
+    
+    successful = df[["Latitude", "Longitude"]].notna().all(axis=1).sum()
+    print(f"\n✓ Fetched {successful}/{total} coordinates successfully in {time.time() - start:.1f}s")
+    if cache is not None:
+        cache.report("geocode")
+    
+    return df
+
+
+def fetch_coordinates(input_file, api_key, cache=None, workers=MAX_WORKERS, qps=REQUESTS_PER_SECOND):
+    """Fetch coordinates for all restaurants (CSV in, CSV out)."""
+    
+    df = lookup_coordinates(read_csv(input_file), api_key, cache, workers, qps)
+    return write_csv(df, "restaurants_with_coordinates.csv")
+
+
+# ============================================================================
+# STEPS 3+4 COMBINED: RESOLVE ADDRESSES AND COORDINATES IN ONE PASS
+# ============================================================================
+
+def resolve_place(restaurant, neighborhood, api_key, cache=None, session=None, limiter=None):
+    """Get (address, lat, lng) for a restaurant, geocoding only if Places has no location."""
+    
+    place = get_place(restaurant, neighborhood, api_key, cache, session, limiter)
+    if not place:
+        return None, None, None
+    
+    lat, lng = place["lat"], place["lng"]
+    if lat is None or lng is None:
+        lat, lng = get_coordinates(place["address"], api_key, cache, session, limiter)
+    
+    return place["address"], lat, lng
+
+
+def lookup_addresses_and_coordinates(df, api_key, cache=None, workers=MAX_WORKERS,
+                                     qps=REQUESTS_PER_SECOND, journal_file="restaurants_resolved.journal"):
+    """Return a copy of `df` with Address, Latitude and Longitude from one pass.
+    
+    The Places Text Search result already carries the restaurant's location,
+    so the Geocoding API is only called for results without geometry.
+    """
+    
+    print("\n" + "=" * 80)
+    print("STEPS 3+4: FETCHING ADDRESSES AND COORDINATES VIA GOOGLE PLACES API")
+    print("=" * 80)
+    
+    df = df.copy()
+    total = len(df)
+    
+    session = create_session(workers)
+    limiter = rate_limiter(qps)
+    geocode_misses = cache.misses.get("geocode", 0) if cache else 0
+    journal = StageJournal(journal_file)
+    
+    start = time.time()
+    try:
+        with session:
+            resolved = resolve_unique(
+                df, place_queries(df), ["Address", "Latitude", "Longitude"],
+                lambda item: journal.run(item[0], lambda: resolve_place(
+                    item[1].Restaurant, item[1].Neighborhood, api_key, cache, session, limiter
+                )),
+                workers,
+                lambda item: f"Resolved: {item[1].Restaurant}"
+            )
+    finally:
+        journal.close()
+    
+    df["Address"] = resolved["Address"]
+    df["Latitude"] = pd.to_numeric(resolved["Latitude"])
+    df["Longitude"] = pd.to_numeric(resolved["Longitude"])
+    journal.remove()
+    
+    successful = df[["Latitude", "Longitude"]].notna().all(axis=1).sum()
+    print(f"\n✓ Resolved {successful}/{total} restaurants successfully in {time.time() - start:.1f}s")
+    if cache is not None:
+        cache.report("place")
+        fallbacks = cache.misses.get("geocode", 0) - geocode_misses
+        print(f"✓ Geocoding API fallbacks: {fallbacks}")
+    
+    return df
+
+
+def fetch_addresses_and_coordinates(input_file, api_key, cache=None, workers=MAX_WORKERS,
+                                    qps=REQUESTS_PER_SECOND):
+    """Fetch addresses and coordinates in a single pass (CSV in, CSV out).
+    
+    Writes the same file as fetch_coordinates().
+    """
+    
+    df = lookup_addresses_and_coordinates(read_csv(input_file), api_key, cache, workers, qps)
+    return write_csv(df, "restaurants_with_coordinates.csv")
+
+
+# ============================================================================
+# STEP 4.5: VALIDATE COORDINATES
+# ============================================================================
+
+def points_in_polygon(lat, lng, polygon=NYC_POLYGON):
+    """Boolean array: which of the points are inside `polygon` (ray casting)."""
+    
+    start = np.asarray(polygon, dtype=float)
+    end = np.roll(start, -1, axis=0)
+    lat = np.asarray(lat, dtype=float)[:, None]
+    lng = np.asarray(lng, dtype=float)[:, None]
+    
+    # Count the polygon edges crossed by a ray running west from each point
+    spans = (start[:, 0] > lat) != (end[:, 0] > lat)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossing = start[:, 1] + (lat - start[:, 0]) * (end[:, 1] - start[:, 1]) / (end[:, 0] - start[:, 0])
+    return (spans & (lng < crossing)).sum(axis=1) % 2 == 1
+
+
+def distance_m(lat1, lng1, lat2, lng2):
+    """Approximate distance in meters (equirectangular, fine within a city)."""
+    
+    x = np.radians(np.subtract(lng2, lng1)) * np.cos(np.radians(NYC_CENTER[0]))
+    y = np.radians(np.subtract(lat2, lat1))
+    return np.hypot(x, y) * 6_371_000
+
+
+def find_suspect_coordinates(df):
+    """Check every located restaurant in `df` for a likely bad geocode.
+    
+    A location is suspect if it's outside NYC_POLYGON, or far from the
+    median location of the other restaurants in its neighborhood (beyond
+    both OUTLIER_DISTANCE_M and OUTLIER_SPREAD_FACTOR times the
+    neighborhood's median distance). Returns a DataFrame aligned with `df`
+    with "Reason" (None if the location looks fine), "Distance" from the
+    neighborhood median, and the "NearLatitude"/"NearLongitude" and
+    "MaxDistance" a corrected location should satisfy (NaN if unknown).
+    """
+    
+    lat = df["Latitude"].to_numpy(dtype=float)
+    lng = df["Longitude"].to_numpy(dtype=float)
+    located = ~(np.isnan(lat) | np.isnan(lng))
+    inside = np.zeros(len(df), dtype=bool)
+    inside[located] = points_in_polygon(lat[located], lng[located])
+    
+    # Neighborhood medians only count locations inside NYC
+    neighborhoods = df["Neighborhood"].astype(str).to_numpy()
+    groups = pd.DataFrame({"lat": np.where(inside, lat, np.nan), "lng": np.where(inside, lng, np.nan)}).groupby(neighborhoods)
+    enough = groups["lat"].transform("count").to_numpy() >= OUTLIER_MIN_NEIGHBORS
+    near_lat = np.where(enough, groups["lat"].transform("median"), np.nan)
+    near_lng = np.where(enough, groups["lng"].transform("median"), np.nan)
+    
+    distance = distance_m(lat, lng, near_lat, near_lng)
+    spread = pd.Series(np.where(inside, distance, np.nan)).groupby(neighborhoods).transform("median").to_numpy()
+    max_distance = np.maximum(OUTLIER_DISTANCE_M, OUTLIER_SPREAD_FACTOR * spread)
+    with np.errstate(invalid='ignore'):
+        far = distance > max_distance
+    
+    reasons = np.full(len(df), None, dtype=object)
+    reasons[far] = [f"{d / 1000:.1f} km from its neighborhood's other restaurants" for d in distance[far]]
+    reasons[located & ~inside] = "outside NYC"
+    
+    return pd.DataFrame({
+        "Reason": reasons,
+        "Distance": distance.round(),
+        "NearLatitude": near_lat,
+        "NearLongitude": near_lng,
+        "MaxDistance": max_distance
+    }, index=df.index)
+
+
+def get_place_strict(restaurant, neighborhood, near, max_distance, api_key, cache=None, session=None,
+                     limiter=None):
+    """Look a restaurant up again after its first location looked wrong.
+    
+    The search is biased toward `near` (its neighborhood's median location,
+    or None for the middle of NYC), and instead of simply taking the first
+    result, takes the first one inside NYC and, if `near` is known, within
+    `max_distance` meters of it. Returns a dict like get_place(), or None.
+    """
+    
+    query = f"{restaurant}, {neighborhood}"
+    
+    if cache is not None:
+        found, place = cache.get("place_strict", query)
+        if found:
+            return place
+    
+    url = PLACES_URL
+    params = {
+        "query": query,
+        "location": "{},{}".format(*(near or NYC_CENTER)),
+        "radius": int(max_distance if near else 25000),
+        "key": api_key
+    }
+    
+    try:
+        response = request_json(url, params, session, limiter)
+        for result in response["results"]:
+            location = result.get("geometry", {}).get("location", {})
+            lat, lng = location.get("lat"), location.get("lng")
+            if lat is None or lng is None or not points_in_polygon([lat], [lng])[0]:
+                continue
+            if near and distance_m(lat, lng, *near) > max_distance:
+                continue
+            place = {"address": result["formatted_address"], "lat": lat, "lng": lng}
+            if cache is not None:
+                cache.set("place_strict", query, place)
+            return place
+        if cache is not None:
+            cache.set("place_strict", query, None)
+    except Exception as e:
+        print(f"  ✗ Error re-geocoding {restaurant}: {e}")
+    
+    return None
+
+
+def check_coordinates(df, api_key=None, cache=None, workers=MAX_WORKERS, qps=REQUESTS_PER_SECOND,
+                      suspects_file="suspect_coordinates.csv"):
+    """Return a copy of `df` with suspect locations re-geocoded or removed.
+    
+    Suspects (see find_suspect_coordinates()) are looked up again with
+    get_place_strict() if an API key is given, then everything is checked
+    again. Locations still outside NYC are cleared, so the restaurant is
+    left off the map; those that are only far from their neighborhood are
+    kept. Either way they're listed in `suspects_file` for review.
+    """
+    
+    print("\n" + "=" * 80)
+    print("STEP 4.5: VALIDATING COORDINATES")
+    print("=" * 80)
+    
+    df = df.copy()
+    checks = find_suspect_coordinates(df)
+    suspects = checks["Reason"].notna()
+    located = df[["Latitude", "Longitude"]].notna().all(axis=1).sum()
+    print(f"✓ Checked {located} locations: {suspects.sum()} suspect")
+    
+    if suspects.any() and api_key:
+        queue = df[suspects].join(checks.loc[suspects, ["NearLatitude", "NearLongitude", "MaxDistance"]])
+        session = create_session(workers)
+        limiter = rate_limiter(qps)
+        
+        def relookup(item):
+            row = item[1]
+            near = None if pd.isna(row.NearLatitude) else (row.NearLatitude, row.NearLongitude)
+            place = get_place_strict(row.Restaurant, row.Neighborhood, near, row.MaxDistance,
+                                     api_key, cache, session, limiter)
+            return (place["address"], place["lat"], place["lng"]) if place else (None, None, None)
+        
+        with session:
+            retried = resolve_unique(queue, place_queries(queue), ["Address", "Latitude", "Longitude"], relookup,
+                                     workers, lambda item: f"Re-geocoded: {item[1].Restaurant}")
+        
+        found = retried["Latitude"].notna()
+        df.loc[retried.index[found], ["Address", "Latitude", "Longitude"]] = retried[found].to_numpy()
+        df["Latitude"] = pd.to_numeric(df["Latitude"])
+        df["Longitude"] = pd.to_numeric(df["Longitude"])
+        print(f"✓ Found a better location for {found.sum()}/{len(queue)} suspects")
+        if cache is not None:
+            cache.report("place_strict")
+        
+        checks = find_suspect_coordinates(df)
+        suspects = checks["Reason"].notna()
+    
+    outside = checks["Reason"] == "outside NYC"
+    df.loc[outside, ["Latitude", "Longitude"]] = np.nan
+    
+    if suspects.any():
+        for row in df[suspects].join(checks["Reason"]).itertuples():
+            print(f"  ⚠ {row.Restaurant} ({row.Neighborhood}): {row.Reason}")
+        df[suspects].join(checks.loc[suspects, ["Reason", "Distance"]]).to_csv(suspects_file, index=False)
+        METRICS.record_file(suspects_file)
+        print(f"⚠ {suspects.sum()} suspect locations ({outside.sum()} removed) listed in: {suspects_file}")
+    else:
+        if os.path.exists(suspects_file):
+            os.remove(suspects_file)
+        print("✓ All locations look right")
+    
+    return df
+
+
+def validate_coordinates(input_file, api_key=None, cache=None, workers=MAX_WORKERS, qps=REQUESTS_PER_SECOND):
+    """Validate coordinates and re-geocode suspects (CSV in, CSV out)."""
+    
+    df = check_coordinates(read_csv(input_file), api_key, cache, workers, qps)
+    return write_csv(df, "restaurants_validated.csv")
+
+
+# ============================================================================
+# INCREMENTAL MODE: ONLY RESOLVE NEW RESTAURANTS
+# ============================================================================
+
+def neighborhood_names(df, city_suffix=CITY_SUFFIX):
+    """Neighborhoods without `city_suffix` ("" for none), whether or not it was appended."""
+    
+    neighborhoods = df["Neighborhood"].fillna("").astype(str).str.removesuffix(city_suffix)
+    return neighborhoods.mask(neighborhoods == city_suffix.removeprefix(", "), "")
+
+
+def restaurant_keys(df, city_suffix=CITY_SUFFIX):
+    """Build case/whitespace-insensitive (restaurant, neighborhood) match keys.
+    
+    Neighborhoods may be given with or without `city_suffix`.
+    """
+    
+    neighborhoods = neighborhood_names(df, city_suffix)
+    return df["Restaurant"].astype(str).map(normalize_query) + "|" + neighborhoods.map(normalize_query)
+
+
+def load_known_restaurants(json_files, city_suffix=CITY_SUFFIX):
+    """Restaurants from earlier restaurants.json files, indexed by match key.
+    
+    Missing files are skipped with a warning; when a restaurant is in
+    several files, the last one wins.
+    """
+    
+    frames = []
+    for json_file in json_files:
+        if not os.path.exists(json_file):
+            print(f"⚠ No previous data at '{json_file}'")
+            continue
+        frame = load_restaurants_json(json_file)
+        frames.append(frame.set_axis(restaurant_keys(frame, city_suffix)))
+    
+    if not frames:
+        return pd.DataFrame(columns=["Restaurant", "Cuisine", "Neighborhood", "Address", "Latitude", "Longitude"])
+    known = pd.concat(frames)
+    return known[~known.index.duplicated(keep="last")]
+
+
+def find_renamed_restaurants(df, candidates, city_suffix=CITY_SUFFIX):
+    """Match rows of `df` to `candidates` listed under a slightly different name.
+    
+    Uses a ReconcileIndex (see restaurant_reconcile.py), so only
+    restaurants in the same neighborhood are compared. Returns the matched
+    candidates indexed like the rows of `df` they match, with their own
+    match key in "Previous key" and the name similarity in "Score".
+    """
+    
+    index = ReconcileIndex(candidates["Restaurant"], neighborhood_names(candidates, city_suffix))
+    ids, scores = index.match(df["Restaurant"], neighborhood_names(df, city_suffix))
+    found = ids >= 0
+    matches = candidates.iloc[ids[found]]
+    return matches.assign(**{"Previous key": matches.index, "Score": scores[found]}).set_axis(df.index[found])
+
+
+def split_new_restaurants(df, previous_json, city_suffix=CITY_SUFFIX, history_json=(), fuzzy=True):
+    """Split a fresh scrape into restaurants that need API lookups and ones that don't.
+    
+    Rows are matched to the previous `restaurants.json`, and to older ones
+    in `history_json` (e.g. past seasons), on restaurant name and
+    neighborhood. Matched rows keep their previous address and coordinates;
+    a changed cuisine is picked up from the new scrape without a new lookup,
+    since the API queries only depend on name and neighborhood. With
+    `fuzzy`, rows that don't match exactly are also matched to restaurants
+    no longer listed under the same name in the same neighborhood (see
+    find_renamed_restaurants()), so a renamed listing isn't looked up again.
+    
+    Returns a DataFrame with only the new rows and a DataFrame of known
+    locations indexed by match key.
+    """
+    
+    print("\n" + "=" * 80)
+    print("INCREMENTAL UPDATE: COMPARING WITH PREVIOUS RUN")
+    print("=" * 80)
+    
+    columns = ["Address", "Latitude", "Longitude"]
+    
+    previous = load_known_restaurants([previous_json], city_suffix)
+    if previous.empty:
+        print("⚠ Every restaurant that isn't in an earlier season will be looked up")
+    archive = pd.concat([load_known_restaurants(history_json, city_suffix), previous]) if history_json else previous
+    archive = archive[~archive.index.duplicated(keep="last")]
+    
+    keys = restaurant_keys(df, city_suffix)
+    is_known = keys.isin(archive.index)
+    previous_cuisine = archive["Cuisine"].reindex(keys).to_numpy()
+    changed = is_known & (df["Cuisine"].astype(str).to_numpy() != previous_cuisine.astype(str))
+    
+    renamed = pd.DataFrame(columns=["Restaurant"] + columns + ["Previous key", "Score"])
+    if fuzzy and not is_known.all() and not archive.empty:
+        renamed = find_renamed_restaurants(df[~is_known], archive[~archive.index.isin(keys)], city_suffix)
+    is_new = ~is_known & ~df.index.isin(renamed.index)
+    removed = (~previous.index.isin(keys) & ~previous.index.isin(renamed["Previous key"])).sum()
+    
+    print(f"✓ Unchanged: {(is_known & ~changed).sum()}")
+    print(f"✓ Cuisine changed (location reused): {changed.sum()}")
+    if history_json:
+        print(f"✓ Back from an earlier season (location reused): {(is_known & ~keys.isin(previous.index)).sum()}")
+    print(f"✓ Renamed (location reused): {len(renamed)}")
+    for i, match in renamed.iterrows():
+        print(f"  ↻ {match['Restaurant']} → {df.at[i, 'Restaurant']} ({match['Score']:.0%} similar)")
+    print(f"✓ New: {is_new.sum()}")
+    print(f"✓ No longer listed: {removed}")
+    
+    known = pd.concat([archive[columns], renamed[columns].set_axis(keys[renamed.index])])
+    return df[is_new], known[~known.index.duplicated(keep="last")]
+
+
+def merge_new_restaurants(df, known, resolved=None, city_suffix=CITY_SUFFIX):
+    """Combine the full scrape with reused and newly resolved locations.
+    
+    `df` is the reviewed scrape, `known` comes from split_new_restaurants()
+    and `resolved` is the output of the API steps for the new rows.
+    """
+    
+    print("\n" + "=" * 80)
+    print("INCREMENTAL UPDATE: MERGING NEW AND UNCHANGED RESTAURANTS")
+    print("=" * 80)
+    
+    keys = restaurant_keys(df, city_suffix)
+    neighborhoods = df["Neighborhood"].fillna("").astype(str).str.strip()
+    df = df.assign(Neighborhood=(neighborhoods + city_suffix).str.removeprefix(", "))
+    
+    locations = known
+    if resolved is not None and not resolved.empty:
+        resolved = resolved.set_index(restaurant_keys(resolved, city_suffix))
+        locations = pd.concat([known, resolved[known.columns]])
+        locations = locations[~locations.index.duplicated(keep="last")]
+    
+    df = pd.concat([df, locations.reindex(keys).set_index(df.index)], axis=1)
+    
+    located = df[["Latitude", "Longitude"]].notna().all(axis=1).sum()
+    print(f"✓ Merged {len(df)} restaurants ({located} with coordinates)")
+    
+    return df
+
+
+# ============================================================================
+# STREAMING MODE: OVERLAP SCRAPING WITH THE API STEPS
+# ============================================================================
+
+STREAM_END = object()  # Closes a streaming stage's queue
+
+
+def deduplicated(func):
+    """Wrap `func(key, *args)` so it runs once per key.
+    
+    Later calls with the same key get the first call's result, waiting
+    for it if it's still running on another thread.
+    """
+    
+    results = {}
+    lock = threading.Lock()
+    
+    def call(key, *args):
+        with lock:
+            future = results.get(key)
+            owner = future is None
+            if owner:
+                future = results[key] = Future()
+        if owner:
+            try:
+                future.set_result(func(key, *args))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+    
+    return call
+
+
+class StreamPipeline:
+    """Runs per-row stages concurrently, connected by bounded queues.
+    
+    `source` is iterated on its own thread, and each stage added with
+    add_stage() gets its own worker threads, so a row moves on as soon as
+    a stage is done with it instead of waiting for the whole batch. Each
+    queue holds at most `queue_size` rows: a stage that falls behind makes
+    the ones before it wait rather than piling up work in memory.
+    Iterating over the pipeline starts it and yields rows as they leave
+    the last stage; the first error raised by the source or a stage is
+    re-raised once the stream has drained.
+    """
+    
+    def __init__(self, source, queue_size=STREAM_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.queues = [queue.Queue(queue_size)]
+        self.errors = []
+        self.threads = [threading.Thread(target=self.produce, args=(source,), daemon=True)]
+    
+    def produce(self, source):
+        try:
+            for item in source:
+                if self.errors:
+                    break
+                self.queues[0].put(item)
+        except Exception as e:
+            self.errors.append(e)
+        finally:
+            self.queues[0].put(STREAM_END)
+    
+    def add_stage(self, func, workers=1):
+        """Apply `func` to every row on `workers` threads, passing its results downstream."""
+        
+        inbox = self.queues[-1]
+        outbox = queue.Queue(self.queue_size)
+        self.queues.append(outbox)
+        lock = threading.Lock()
+        running = workers
+        
+        def work():
+            nonlocal running
+            while True:
+                item = inbox.get()
+                if item is STREAM_END:
+                    inbox.put(STREAM_END)  # Let the stage's other workers see it too
+                    with lock:
+                        running -= 1
+                        if running == 0:
+                            outbox.put(STREAM_END)
+                    return
+                if self.errors:
+                    continue  # Keep draining so earlier stages don't block
+                try:
+                    outbox.put(func(item))
+                except Exception as e:
+                    self.errors.append(e)
+        
+        self.threads += [threading.Thread(target=work, daemon=True) for _ in range(workers)]
+        return self
+    
+    def __iter__(self):
+        for thread in self.threads:
+            thread.start()
+        while True:
+            item = self.queues[-1].get()
+            if item is STREAM_END:
+                break
+            yield item
+        if self.errors:
+            raise self.errors[0]
+
+
+def stream_restaurants(api_key=None, cache=None, fused=True, base_url=BASE_URL, max_pages=MAX_PAGES,
+                       workers=MAX_WORKERS, qps=REQUESTS_PER_SECOND, scrape_workers=SCRAPE_WORKERS,
+                       queue_size=STREAM_QUEUE_SIZE, output_file="restaurants_with_coordinates.csv",
+                       city_suffix=CITY_SUFFIX, review_rules=REVIEW_RULES_FILE,
+                       changes_file="review_changes.csv", journal_file="restaurants_streamed.journal"):
+    """Scrape and resolve the restaurants as one stream (steps 1-4 overlapped).
+    
+    Cards are parsed as each listing page arrives and flow through the
+    append, address and coordinate steps while later pages are still
+    downloading, so the run takes about as long as its slowest step rather
+    than the sum of them all. Each page's rows are corrected with the
+    `review_rules` file (see review_restaurants()) as the page is parsed.
+    With `fused`, the coordinate step only geocodes restaurants whose
+    Places result had no location, as in lookup_addresses_and_coordinates().
+    Without an API key only the scrape and append steps run.
+    
+    Rows are appended to `output_file` as they finish, in completion order;
+    the returned DataFrame has the same columns as the batch steps, in
+    listing order. Each distinct lookup is made once per run, and results
+    are journaled to `journal_file` so an interrupted run can resume. Uses
+    the HTTP scraper backend only.
+    """
+    
+    print("=" * 80)
+    print("STEPS 1-4: STREAMING SCRAPE, APPEND AND API LOOKUPS")
+    print("=" * 80)
+    
+    columns = ["Restaurant", "Cuisine", "Neighborhood"]
+    if api_key:
+        columns += ["Address", "Latitude", "Longitude"]
+    
+    session = create_session(2 * workers)
+    limiter = rate_limiter(qps)
+    journal = StageJournal(journal_file) if api_key else None
+    lookup = deduplicated(lambda key, func, *args: journal.run(
+        key, lambda: func(*args, api_key, cache, session, limiter)
+    ))
+    
+    rules = load_review_rules(review_rules)
+    changes = []
+    
+    def scrape():
+        for page, html in iter_listing_pages(base_url, max_pages, scrape_workers):
+            restaurants = parse_restaurant_cards(html)
+            print(f"  Page {page}: {len(restaurants)} restaurants")
+            if rules is not None and restaurants:
+                # Once per page, so the rules run vectorized on a small DataFrame
+                reviewed, changed = apply_review_rules(pd.DataFrame(restaurants), rules)
+                restaurants = reviewed.to_dict("records")
+                changes.append(changed)
+            for i, restaurant in enumerate(restaurants):
+                yield (page, i), restaurant
+    
+    def append(item):
+        order, row = item
+        neighborhood = str(row["Neighborhood"]).strip()
+        return order, {**row, "Neighborhood": (neighborhood + city_suffix).removeprefix(", ")}
+    
+    def find_address(item):
+        order, row = item
+        query = normalize_query(f"{row['Restaurant']}, {row['Neighborhood']}")
+        if fused:
+            place = lookup("place|" + query, get_place, row["Restaurant"], row["Neighborhood"])
+        else:
+            address = lookup("address|" + query, get_address, row["Restaurant"], row["Neighborhood"])
+            place = {"address": address, "lat": None, "lng": None} if address else None
+        place = place or {"address": None, "lat": None, "lng": None}
+        return order, {**row, "Address": place["address"], "Latitude": place["lat"], "Longitude": place["lng"]}
+    
+    def find_coordinates(item):
+        order, row = item
+        if row["Address"] and (row["Latitude"] is None or row["Longitude"] is None):
+            lat, lng = lookup("geocode|" + normalize_query(row["Address"]), get_coordinates, row["Address"])
+            row = {**row, "Latitude": lat, "Longitude": lng}
+        return order, row
+    
+    stream = StreamPipeline(scrape(), queue_size).add_stage(append)
+    if api_key:
+        stream.add_stage(find_address, workers).add_stage(find_coordinates, workers)
+    
+    rows = {}
+    start = time.time()
+    try:
+        with session, open(output_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, columns)
+            writer.writeheader()
+            for done, (order, row) in enumerate(stream, 1):
+                writer.writerow(row)
+                rows[order] = row
+                print(f"  [{done}] Resolved: {row['Restaurant']}")
+    finally:
+        if journal is not None:
+            journal.close()
+    METRICS.record_file(output_file)
     
-    # Write to CSV
-    output_file = 'nyc_restaurant_week.csv'
+    if not rows:
+        raise RuntimeError("No restaurants found over HTTP (run without streaming to try the Selenium scraper)")
     
-    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['Restaurant', 'Cuisine', 'Neighborhood']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for restaurant in all_restaurants:
-            writer.writerow(restaurant)
+    if rules is not None:
+        print(f"\n✓ Applied review rules version {rules.get('version', '?')} from '{review_rules}'")
+        changes = [change for change in changes if not change.empty]
+        changes = pd.concat(changes, ignore_index=True) if changes else pd.DataFrame(columns=REVIEW_CHANGE_COLUMNS)
+        print_review_changes(changes, changes_file)
     
-    print(f"\n✓ Saved {len(all_restaurants)} restaurants to: {output_file}")
-    return output_file
+    df = pd.DataFrame([rows[order] for order in sorted(rows)], columns=columns)
+    print(f"\n✓ Saved {len(df)} rows to: {output_file}")
+    if api_key:
+        df["Latitude"] = pd.to_numeric(df["Latitude"])
+        df["Longitude"] = pd.to_numeric(df["Longitude"])
+        journal.remove()
+        located = df[["Latitude", "Longitude"]].notna().all(axis=1).sum()
+        print(f"✓ Streamed {len(df)} restaurants ({located} with coordinates) in {time.time() - start:.1f}s")
+        if cache is not None:
+            cache.report("place")
+    else:
+        print(f"✓ Streamed {len(df)} restaurants in {time.time() - start:.1f}s")
+    
+    return df
 
 
 # ============================================================================
-# STEP 1.5: MANUAL REVIEW CHECKPOINT
+# STEP 5: CONVERT CSV TO JSON
 # ============================================================================
 
-def manual_review_checkpoint(csv_file):
-    """Pause for manual data review and correction."""
+def compact_restaurants(df):
+    """Build the compact, column-oriented form of the restaurant data.
     
-    print("\n" + "=" * 80)
-    print("MANUAL REVIEW CHECKPOINT")
-    print("=" * 80)
-    print(f"\nScraping complete! The data has been saved to '{csv_file}'")
-    print("\nBefore continuing with API calls, please review the data for any issues.")
-    print("\nSteps:")
-    print(f"  1. Open '{csv_file}' in Excel or a text editor")
-    print("  2. Review and fix any issues you find")
-    print("  3. Save the file")
-    print("  4. Return here and press Enter to continue")
+    Each column is stored once as a list instead of repeating keys on every
+    record. DICTIONARY_COLUMNS hold indexes into one shared `strings` table,
+    and COORDINATE_COLUMNS hold integers to be divided by `scale`. The map's
+    decodeRestaurants() turns this back into a list of records.
+    """
     
-    input("\nPress Enter when ready to continue the pipeline...")
+    dictionary = [column for column in DICTIONARY_COLUMNS if column in df]
+    scaled = [column for column in COORDINATE_COLUMNS if column in df]
     
-    print("✓ Continuing pipeline...")
+    codes, strings = pd.factorize(pd.concat([df[column].astype(str) for column in dictionary]))
+    columns = {}
+    for column in df.columns:
+        if column in dictionary:
+            start = dictionary.index(column) * len(df)
+            columns[column] = codes[start:start + len(df)].tolist()
+        elif column in scaled:
+            columns[column] = (df[column] * COORDINATE_SCALE).round().astype("int64").tolist()
+        else:
+            columns[column] = df[column].astype(object).where(df[column].notna(), None).tolist()
     
-    return csv_file
-
+    return {
+        "format": "columnar",
+        "version": 1,
+        "count": len(df),
+        "scale": COORDINATE_SCALE,
+        "dictionary": dictionary,
+        "scaled": scaled,
+        "strings": strings.tolist(),
+        "columns": columns
+    }
 
-# ============================================================================
-# STEP 2: APPEND ", NEW YORK, NY" TO NEIGHBORHOODS
-# ============================================================================
 
-def append_city_to_neighborhoods(input_file):
-    """Append ', New York, NY' to all neighborhood values."""
+def build_filter_index(df):
+    """Precompute the lookups the map uses to filter restaurants.
     
-    print("\n" + "=" * 80)
-    print("STEP 2: APPENDING CITY TO NEIGHBORHOODS")
-    print("=" * 80)
+    Row ids are positions in restaurants.json. The index holds the sorted
+    cuisine list, a cuisine -> row ids map and a lowercase name n-gram ->
+    row ids map, with every id list in ascending order so the map can
+    intersect them without sorting.
+    """
     
-    df = pd.read_csv(input_file)
-    df["Neighborhood"] = df["Neighborhood"].astype(str) + ", New York, NY"
+    names = df["Restaurant"].astype(str).str.lower().tolist()
+    cuisines = df["Cuisine"].astype(str)
     
-    output_file = "nyc_restaurants_nyc.csv"
-    df.to_csv(output_file, index=False)
+    by_cuisine = {
+        cuisine: ids.tolist()
+        for cuisine, ids in pd.Series(range(len(df))).groupby(cuisines.to_numpy())
+    }
     
-    print(f"✓ Appended ', New York, NY' to {len(df)} neighborhoods")
-    print(f"✓ Saved to: {output_file}")
+    postings = {}
+    for row_id, name in enumerate(names):
+        for gram in {name[i:i + NAME_NGRAM] for i in range(len(name) - NAME_NGRAM + 1)}:
+            postings.setdefault(gram, []).append(row_id)
     
-    return output_file
+    return {
+        "version": 1,
+        "count": len(df),
+        "ngram": NAME_NGRAM,
+        "cuisines": sorted(by_cuisine),
+        "byCuisine": by_cuisine,
+        "names": postings
+    }
 
 
-# ============================================================================
-# STEP 3: FETCH ADDRESSES VIA GOOGLE PLACES API
-# ============================================================================
+def write_filter_index(df, index_file="restaurants_index.json"):
+    """Write build_filter_index() for the restaurants in `df` to `index_file`."""
+    
+    with open(index_file, 'w', encoding='utf-8') as f:
+        json.dump(build_filter_index(df), f, ensure_ascii=False, separators=(',', ':'))
+    METRICS.record_file(index_file)
+    
+    print(f"✓ Saved filter index to: {index_file} ({os.path.getsize(index_file) / 1024:.1f} KB)")
+    return index_file
 
-def get_address(restaurant, neighborhood, api_key):
-    """Get address for a restaurant using Google Places API."""
+
+def build_cluster_index(df, min_zoom=CLUSTER_MIN_ZOOM, max_zoom=CLUSTER_MAX_ZOOM, radius=CLUSTER_RADIUS):
+    """Precompute the map's restaurant clusters for every zoom level.
     
-    query = f"{restaurant}, {neighborhood}"
-    url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-    params = {
-        "query": query,
-        "key": api_key
+    Restaurants are projected to Web Mercator and binned into square cells
+    `radius` screen pixels wide. A cell at one zoom covers exactly four cells
+    at the next, so the clusters nest: each level's `parent` gives the index
+    of every cluster's parent one zoom out, and `leaf` gives every
+    restaurant's cluster at `max_zoom`. `point` is one member of each
+    cluster (its only member when `count` is 1). Coordinates are scaled
+    integers, as in compact_restaurants().
+    """
+    
+    lat = df["Latitude"].to_numpy(dtype=float)
+    lng = df["Longitude"].to_numpy(dtype=float)
+    x = (lng + 180) / 360
+    y = (1 - np.arcsinh(np.tan(np.radians(lat))) / np.pi) / 2
+    
+    levels = []
+    owner = np.zeros(len(df), dtype=np.int64)  # Each restaurant's cluster one zoom out
+    for zoom in range(min_zoom, max_zoom + 1):
+        cells = 256 * 2**zoom / radius
+        keys = np.floor(x * cells).astype(np.int64) * (int(cells) + 1) + np.floor(y * cells).astype(np.int64)
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        counts = np.bincount(inverse, minlength=len(first))
+        
+        levels.append({
+            "zoom": zoom,
+            "lat": np.round(np.bincount(inverse, lat) / counts * COORDINATE_SCALE).astype(np.int64).tolist(),
+            "lng": np.round(np.bincount(inverse, lng) / counts * COORDINATE_SCALE).astype(np.int64).tolist(),
+            "count": counts.tolist(),
+            "point": first.tolist(),
+            "parent": owner[first].tolist() if zoom > min_zoom else []
+        })
+        owner = inverse
+    
+    return {
+        "version": 1,
+        "count": len(df),
+        "minZoom": min_zoom,
+        "maxZoom": max_zoom,
+        "radius": radius,
+        "scale": COORDINATE_SCALE,
+        "levels": levels,
+        "leaf": owner.tolist()
     }
+
+
+def write_cluster_index(df, cluster_file="restaurants_clusters.json"):
+    """Write build_cluster_index() for the restaurants in `df` to `cluster_file`."""
     
-    try:
-        response = requests.get(url, params=params).json()
-        if response["results"]:
-            return response["results"][0]["formatted_address"]
-    except Exception as e:
-        print(f"  ✗ Error fetching address for {restaurant}: {e}")
+    with open(cluster_file, 'w', encoding='utf-8') as f:
+        json.dump(build_cluster_index(df), f, separators=(',', ':'))
+    METRICS.record_file(cluster_file)
     
-    return None
+    print(f"✓ Saved map clusters to: {cluster_file} ({os.path.getsize(cluster_file) / 1024:.1f} KB)")
+    return cluster_file
 
 
-def fetch_addresses(input_file, api_key):
-    """Fetch addresses for all restaurants."""
+def geohash_encode(lat, lng, precision=TILE_PRECISION):
+    """Geohashes of `precision` characters for arrays of coordinates."""
     
-    print("\n" + "=" * 80)
-    print("STEP 3: FETCHING ADDRESSES VIA GOOGLE PLACES API")
-    print("=" * 80)
+    lat_range = np.array([[-90.0, 90.0]]).repeat(len(lat), axis=0)
+    lng_range = np.array([[-180.0, 180.0]]).repeat(len(lng), axis=0)
+    values = np.zeros(len(lat), dtype=np.int64)
     
-    df = pd.read_csv(input_file)
-    addresses = []
+    # Bits alternate between longitude and latitude, halving the range each time
+    for bit in range(5 * precision):
+        coordinate, bounds = (lng, lng_range) if bit % 2 == 0 else (lat, lat_range)
+        middle = bounds.mean(axis=1)
+        upper = coordinate >= middle
+        values = values * 2 + upper
+        bounds[upper, 0] = middle[upper]
+        bounds[~upper, 1] = middle[~upper]
     
-    total = len(df)
-    for idx, row in df.iterrows():
-        print(f"  [{idx+1}/{total}] Fetching address for: {row['Restaurant']}")
-        address = get_address(row["Restaurant"], row["Neighborhood"], api_key)
-        addresses.append(address)
-        time.sleep(0.1)  # Be nice to the API
+    characters = [(values >> (5 * (precision - 1 - i))) & 31 for i in range(precision)]
+    alphabet = np.array(list(GEOHASH_ALPHABET))
+    return np.array(["".join(chars) for chars in zip(*(alphabet[c] for c in characters))], dtype=object)
+
+
+def write_geohash_tiles(df, tiles_dir="tiles", precision=TILE_PRECISION):
+    """Split the restaurants in `df` into one file per geohash tile.
     
-    df["Address"] = addresses
+    Each tile is written as `<tiles_dir>/<geohash>.json` in the compact
+    format, and `<tiles_dir>/manifest.json` lists every tile with its
+    restaurant count and the [south, west, north, east] bounds of its
+    restaurants, so the map can fetch only the tiles in view.
+    """
     
-    output_file = "restaurants_with_addresses.csv"
-    df.to_csv(output_file, index=False)
+    os.makedirs(tiles_dir, exist_ok=True)
+    hashes = geohash_encode(df["Latitude"].to_numpy(dtype=float), df["Longitude"].to_numpy(dtype=float), precision)
     
-    successful = df["Address"].notna().sum()
-    print(f"\n✓ Fetched {successful}/{total} addresses successfully")
-    print(f"✓ Saved to: {output_file}")
+    tiles = []
+    for tile, rows in df.groupby(hashes, sort=True):
+        tile_file = os.path.join(tiles_dir, f"{tile}.json")
+        with open(tile_file, 'w', encoding='utf-8') as f:
+            json.dump(compact_restaurants(rows), f, ensure_ascii=False, separators=(',', ':'))
+        METRICS.record_file(tile_file)
+        tiles.append({
+            "hash": tile,
+            "count": len(rows),
+            "bounds": [rows["Latitude"].min(), rows["Longitude"].min(), rows["Latitude"].max(), rows["Longitude"].max()]
+        })
     
-    return output_file
+    manifest_file = os.path.join(tiles_dir, "manifest.json")
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump({"version": 1, "precision": precision, "count": len(df), "tiles": tiles}, f, separators=(',', ':'))
+    METRICS.record_file(manifest_file)
+    
+    print(f"✓ Saved {len(tiles)} map tiles to: {tiles_dir}/")
+    return manifest_file
 
 
-# ============================================================================
-# STEP 4: FETCH COORDINATES VIA GOOGLE GEOCODING API
-# ============================================================================
+def load_restaurants_json(input_file="restaurants.json"):
+    """Read restaurants.json in either format back into a DataFrame."""
+    
+    with open(input_file, encoding='utf-8') as f:
+        data = json.load(f)
+    
+    if isinstance(data, list):
+        return pd.DataFrame(data)
+    
+    df = pd.DataFrame(data["columns"])
+    strings = pd.Series(data["strings"], dtype=object)
+    for column in data["dictionary"]:
+        df[column] = strings.take(df[column]).to_numpy()
+    for column in data["scaled"]:
+        df[column] = df[column] / data["scale"]
+    return df
 
-def get_coordinates(address, api_key):
-    """Get latitude and longitude for an address using Google Geocoding API."""
+
+def write_precompressed(output_file, data):
+    """Write .gz (and .br, if brotli is installed) copies of `data` next to `output_file`.
     
-    if pd.isna(address) or not address:
-        return None, None
+    Web servers set up to serve precompressed files (e.g. nginx gzip_static)
+    can then send them without compressing on every request.
+    """
     
-    url = "https://maps.googleapis.com/maps/api/geocode/json"
-    params = {
-        "address": address,
-        "key": api_key
-    }
+    sizes = {}
     
-    try:
-        response = requests.get(url, params=params).json()
-        if response["results"]:
-            location = response["results"][0]["geometry"]["location"]
-            return location["lat"], location["lng"]
-    except Exception as e:
-        print(f"  ✗ Error fetching coordinates for {address}: {e}")
+    gzip_file = output_file + ".gz"
+    with open(gzip_file, 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    METRICS.record_file(gzip_file)
+    sizes[gzip_file] = os.path.getsize(gzip_file)
     
-    return None, None
+    if brotli is not None:
+        brotli_file = output_file + ".br"
+        with open(brotli_file, 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+        METRICS.record_file(brotli_file)
+        sizes[brotli_file] = os.path.getsize(brotli_file)
+    else:
+        print("  ℹ Install brotli (pip install brotli) to also write a .br copy")
+    
+    return sizes
 
 
-def fetch_coordinates(input_file, api_key):
-    """Fetch coordinates for all restaurants."""
+def write_restaurants_json(df, output_file="restaurants.json", compact=False, precompress=False,
+                           index_file="restaurants_index.json", cluster_file="restaurants_clusters.json",
+                           tiles_dir=None):
+    """Write the restaurants in `df` to JSON for the interactive map.
+    
+    With `compact`, the file uses the column-oriented format from
+    compact_restaurants() without pretty-printing. With `precompress`,
+    gzip/brotli copies are written alongside it. The map's filter index
+    and zoom-level clusters are written to `index_file` and `cluster_file`
+    (None to skip either). With `tiles_dir`, the restaurants are also split
+    into geohash tiles there (see write_geohash_tiles()).
+    """
     
     print("\n" + "=" * 80)
-    print("STEP 4: FETCHING COORDINATES VIA GOOGLE GEOCODING API")
+    print("STEP 5: CONVERTING CSV TO JSON")
     print("=" * 80)
     
-    df = pd.read_csv(input_file)
-    latitudes = []
-    longitudes = []
+    # Drop rows with missing coordinates
+    df_clean = df.dropna(subset=["Latitude", "Longitude"]).reset_index(drop=True)
     
-    total = len(df)
-    for idx, row in df.iterrows():
-        print(f"  [{idx+1}/{total}] Fetching coordinates for: {row['Restaurant']}")
-        lat, lng = get_coordinates(row["Address"], api_key)
-        latitudes.append(lat)
-        longitudes.append(lng)
-        time.sleep(0.1)  # Be nice to the API
+    if compact:
+        data = json.dumps(compact_restaurants(df_clean), ensure_ascii=False, separators=(',', ':'))
+    else:
+        # Convert to list of dictionaries
+        restaurants_list = df_clean.to_dict('records')
+        data = json.dumps(restaurants_list, indent=2, ensure_ascii=False)
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(data)
+    METRICS.record_file(output_file)
     
-    df["Latitude"] = latitudes
-    df["Longitude"] = longitudes
+    print(f"✓ Converted {len(df_clean)} restaurants to {'compact ' if compact else ''}JSON")
+    print(f"✓ Saved to: {output_file} ({os.path.getsize(output_file) / 1024:.1f} KB)")
     
-    output_file = "restaurants_with_coordinates.csv"
-    df.to_csv(output_file, index=False)
+    if precompress:
+        for path, size in write_precompressed(output_file, data.encode('utf-8')).items():
+            print(f"✓ Saved to: {path} ({size / 1024:.1f} KB)")
     
-    successful = df[["Latitude", "Longitude"]].notna().all(axis=1).sum()
-    print(f"\n✓ Fetched {successful}/{total} coordinates successfully")
-    print(f"✓ Saved to: {output_file}")
+    if index_file is not None:
+        write_filter_index(df_clean, index_file)
+    
+    if cluster_file is not None:
+        write_cluster_index(df_clean, cluster_file)
+    
+    if tiles_dir is not None:
+        write_geohash_tiles(df_clean, tiles_dir)
     
     return output_file
 
 
+def convert_csv_to_json(input_file, compact=False, precompress=False):
+    """Convert CSV file to JSON format for the interactive map."""
+    
+    return write_restaurants_json(read_csv(input_file), compact=compact, precompress=precompress)
+
+
 # ============================================================================
-# STEP 5: CONVERT CSV TO JSON
+# STEP 6: GENERATE INTERACTIVE HTML MAP
 # ============================================================================
 
-def convert_csv_to_json(input_file):
-    """Convert CSV file to JSON format for the interactive map."""
+def bundle_map_html(html_content):
+    """Make the map page self-contained.
     
-    print("\n" + "=" * 80)
-    print("STEP 5: CONVERTING CSV TO JSON")
-    print("=" * 80)
+    The page's own script is minified (if rjsmin is installed) and the
+    MAP_SCRIPTS and MAP_STYLESHEETS are downloaded and inlined, so the page
+    only fetches map tiles, marker images and its data.
+    """
+    
+    if rjsmin is not None:
+        head, rest = html_content.split("<script>\n", 1)
+        script, tail = rest.split("</script>", 1)
+        html_content = f"{head}<script>{rjsmin.jsmin(script)}</script>{tail}"
+    else:
+        print("  ℹ Install rjsmin (pip install rjsmin) to also minify the map script")
     
-    df = pd.read_csv(input_file)
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
     
-    # Drop rows with missing coordinates
-    df_clean = df.dropna(subset=["Latitude", "Longitude"])
+    def download(url):
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+        return response.text
     
-    # Convert to list of dictionaries
-    restaurants_list = df_clean.to_dict('records')
+    for url in MAP_STYLESHEETS:
+        # Point relative url(...) references (e.g. Leaflet's images) back at the CDN
+        css = re.sub(r"url\((['\"]?)(?!data:)([^)'\"]+)\1\)",
+                     lambda match: f"url({urljoin(url, match.group(2))})", download(url))
+        html_content = re.sub(rf'<link rel="stylesheet" href="{re.escape(url)}"\s*/?>',
+                              lambda match: f"<style>{css}</style>", html_content)
     
-    output_file = "restaurants.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(restaurants_list, f, indent=2, ensure_ascii=False)
+    for url in MAP_SCRIPTS:
+        script = download(url).replace("</script", "<\\/script")
+        html_content = re.sub(rf'<script[^>]* src="{re.escape(url)}"></script>',
+                              lambda match: f"<script>{script}</script>", html_content)
+    
+    session.close()
+    return html_content
+
+
+def inline_data_tag(df, render_mode=RENDER_MODE, compress=False):
+    """Build the <script> tag that embeds the map's data in the page.
     
-    print(f"✓ Converted {len(restaurants_list)} restaurants to JSON")
-    print(f"✓ Saved to: {output_file}")
+    It holds the compact restaurants, the filter index and (when the map
+    will cluster them) the zoom-level clusters. With `compress`, the JSON
+    is gzipped and base64-encoded; the map unpacks it with the browser's
+    DecompressionStream.
+    """
     
-    return output_file
+    payload = {"restaurants": compact_restaurants(df), "index": build_filter_index(df)}
+    if render_mode == "clusters" or (render_mode == "auto" and len(df) > CLUSTER_AUTO_THRESHOLD):
+        payload["clusters"] = build_cluster_index(df)
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    
+    if compress:
+        encoded = base64.b64encode(gzip.compress(data.encode('utf-8'), compresslevel=9, mtime=0)).decode('ascii')
+        return f'<script type="application/octet-stream" id="restaurant-data" data-encoding="gzip-base64">{encoded}</script>'
+    
+    # "</" can't appear inside a script element; "<\/" is the same JSON string
+    data = data.replace("</", "<\\/")
+    return f'<script type="application/json" id="restaurant-data">{data}</script>'
 
 
-# ============================================================================
-# STEP 6: GENERATE INTERACTIVE HTML MAP
-# ============================================================================
+def check_map_script(html_content):
+    """Syntax-check the map page's script with `node --check`, if Node.js is installed.
+    
+    The script is built from a Python string, so a stray escape can break
+    the whole page without any error on the Python side. Raises ValueError
+    with node's message if the script doesn't parse.
+    """
+    
+    node = shutil.which("node")
+    if node is None:
+        print("  ℹ Install Node.js to also syntax-check the map script")
+        return
+    
+    script = html_content.split("<script>\n", 1)[1].split("</script>", 1)[0]
+    with tempfile.NamedTemporaryFile("w", suffix=".js", delete=False, encoding="utf-8") as f:
+        f.write(script)
+    try:
+        result = subprocess.run([node, "--check", f.name], capture_output=True, text=True)
+    finally:
+        os.remove(f.name)
+    
+    if result.returncode != 0:
+        raise ValueError(f"The map script doesn't parse:\n{result.stderr.strip()}")
+    print("✓ Map script passes node --check")
 
-def generate_html_map():
-    """Generate the interactive HTML React map."""
+
+def generate_html_map(render_mode=RENDER_MODE, bundle=False, inline_data=None, compress_inline=False,
+                      tiles_dir=None, output_file="restaurant_map.html"):
+    """Generate the interactive HTML React map.
+    
+    `render_mode` picks how restaurants are drawn: "markers" (one pin
+    image each), "canvas" (circles on a shared canvas), "clusters" (the
+    precomputed restaurants_clusters.json clusters, then canvas circles
+    when zoomed in) or "auto" (markers, or clusters above
+    CLUSTER_AUTO_THRESHOLD restaurants). With `bundle`, the page is made
+    self-contained by bundle_map_html().
+    
+    `inline_data` (a DataFrame or a restaurants.json path) embeds the data in
+    the page with inline_data_tag(), gzipped if `compress_inline`. The map
+    then needs no data requests and also works opened from file://.
+    `tiles_dir` (a path relative to the page) makes the map load the
+    write_geohash_tiles() tiles in view instead of all of restaurants.json.
+    The page is written to `output_file`.
+    """
+    
+    if render_mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode: {render_mode!r} (use 'markers', 'canvas', 'clusters' or 'auto')")
+    if inline_data is not None and tiles_dir is not None:
+        raise ValueError("inline_data and tiles_dir can't be combined")
     
     print("\n" + "=" * 80)
     print("STEP 6: GENERATING INTERACTIVE HTML MAP")
@@ -375,10 +2431,9 @@ def generate_html_map():
     <!-- Leaflet CSS -->
     <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.css"/>
     
-    <!-- React and Babel -->
+    <!-- React -->
     <script crossorigin src="https://unpkg.com/react@18/umd/react.production.min.js"></script>
     <script crossorigin src="https://unpkg.com/react-dom@18/umd/react-dom.production.min.js"></script>
-    <script src="https://unpkg.com/@babel/standalone/babel.min.js"></script>
     
     <!-- Leaflet JS -->
     <script src="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.js"></script>
@@ -402,6 +2457,19 @@ def generate_html_map():
             height: 100%;
         }
         
+        .cluster-icon {
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            background: rgba(33, 150, 243, 0.85);
+            border: 2px solid white;
+            border-radius: 50%;
+            box-shadow: 0 1px 4px rgba(0,0,0,0.3);
+            color: white;
+            font-size: 12px;
+            font-weight: bold;
+        }
+        
         /* Desktop styles */
         .filter-panel {
             position: fixed;
@@ -513,35 +2581,257 @@ def generate_html_map():
 </head>
 <body>
     <div id="root"></div>
+    __INLINE_DATA__
+
+    <script>
+        // Plain JavaScript (React.createElement instead of JSX), so the page
+        // runs without compiling anything in the browser
+        const { useState, useEffect, useRef, useMemo } = React;
+        const h = React.createElement;
+
+        // restaurants.json is either a list of records or the compact
+        // column-oriented format written by compact_restaurants()
+        function decodeRestaurants(data) {
+            if (Array.isArray(data)) return data;
+
+            const restaurants = Array.from({ length: data.count }, () => ({}));
+            Object.entries(data.columns).forEach(([column, values]) => {
+                const decode = data.dictionary.includes(column) ? (value => data.strings[value])
+                    : data.scaled.includes(column) ? (value => value / data.scale)
+                    : (value => value);
+                values.forEach((value, i) => { restaurants[i][column] = decode(value); });
+            });
+            return restaurants;
+        }
+
+        // Intersect two ascending lists of row ids
+        function intersectIds(a, b) {
+            const result = [];
+            let i = 0, j = 0;
+            while (i < a.length && j < b.length) {
+                if (a[i] === b[j]) { result.push(a[i]); i++; j++; }
+                else if (a[i] < b[j]) i++;
+                else j++;
+            }
+            return result;
+        }
+
+        // Ids of the restaurants matching the cuisine and name filters. With the
+        // precomputed restaurants_index.json, only the rows listed under the
+        // cuisine and under every n-gram of the search text are checked,
+        // instead of every restaurant.
+        function filterRestaurantIds(restaurants, index, cuisine, searchText) {
+            const query = searchText.toLowerCase();
+            let ids = null;
+
+            if (index && cuisine !== 'all') {
+                ids = index.byCuisine[cuisine] || [];
+            }
+            if (index && query.length >= index.ngram) {
+                for (let i = 0; i + index.ngram <= query.length && (ids === null || ids.length); i++) {
+                    const postings = index.names[query.slice(i, i + index.ngram)] || [];
+                    ids = ids === null ? postings : intersectIds(ids, postings);
+                }
+            }
+
+            const candidates = ids === null ? restaurants.map((restaurant, id) => id) : ids;
+            return candidates.filter(id => {
+                const restaurant = restaurants[id];
+                const cuisineMatch = cuisine === 'all' || restaurant.Cuisine === cuisine;
+                const searchMatch = query === '' || restaurant.Restaurant.toLowerCase().includes(query);
+                return cuisineMatch && searchMatch;
+            });
+        }
+
+        // Zoom-level clusters from restaurants_clusters.json (see
+        // build_cluster_index()). owners[i][id] is restaurant id's cluster at
+        // levels[i], found by following the parent links up from the leaves.
+        function decodeClusters(data) {
+            const levels = data.levels.map(level => ({
+                ...level,
+                lat: level.lat.map(value => value / data.scale),
+                lng: level.lng.map(value => value / data.scale)
+            }));
+            const owners = new Array(levels.length);
+            owners[levels.length - 1] = Int32Array.from(data.leaf);
+            for (let i = levels.length - 1; i > 0; i--) {
+                const parent = levels[i].parent;
+                owners[i - 1] = owners[i].map(cluster => parent[cluster]);
+            }
+            return { minZoom: data.minZoom, maxZoom: data.maxZoom, levels, owners };
+        }
+
+        // Clusters to draw at `zoom`. With every restaurant visible (`ids` is
+        // null) they come straight from the precomputed level; otherwise the
+        // visible restaurants are regrouped under their precomputed clusters.
+        function clustersAtZoom(clusters, zoom, restaurants, ids) {
+            const i = Math.max(0, Math.min(zoom, clusters.maxZoom) - clusters.minZoom);
+            const level = clusters.levels[i];
+            if (ids === null) {
+                return level.count.map((count, c) => ({ lat: level.lat[c], lng: level.lng[c], count, id: level.point[c] }));
+            }
+
+            const owner = clusters.owners[i];
+            const groups = new Map();
+            ids.forEach(id => {
+                const restaurant = restaurants[id];
+                const group = groups.get(owner[id]);
+                if (group) {
+                    group.lat += restaurant.Latitude;
+                    group.lng += restaurant.Longitude;
+                    group.count++;
+                } else {
+                    groups.set(owner[id], { lat: restaurant.Latitude, lng: restaurant.Longitude, count: 1, id });
+                }
+            });
+            return [...groups.values()].map(group => ({
+                ...group, lat: group.lat / group.count, lng: group.lng / group.count
+            }));
+        }
+
+        // Optional JSON that only makes the map faster; missing or unreadable
+        // files resolve to null
+        function fetchOptionalJson(url) {
+            return fetch(url)
+                .then(response => response.ok ? response.json() : null)
+                .catch(() => null);
+        }
+
+        // Data embedded by generate_html_map(inline_data=...), as JSON or as
+        // base64-encoded gzip
+        async function readInlineData(id) {
+            const element = document.getElementById(id);
+            if (element.dataset.encoding !== 'gzip-base64') return JSON.parse(element.textContent);
+
+            const bytes = Uint8Array.from(atob(element.textContent.trim()), c => c.charCodeAt(0));
+            const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+            return JSON.parse(await new Response(stream).text());
+        }
 
-    <script type="text/babel">
-        const { useState, useEffect, useRef } = React;
+        // Start decoding right away instead of waiting for the first render.
+        // Null when the page loads restaurants.json instead.
+        const inlineData = document.getElementById('restaurant-data') ? readInlineData('restaurant-data') : null;
+
+        const SEARCH_DEBOUNCE_MS = 150;
+        const RENDER_MODE = '__RENDER_MODE__'; // 'markers', 'canvas', 'clusters' or 'auto'
+        const CLUSTER_AUTO_THRESHOLD = __CLUSTER_AUTO_THRESHOLD__;
+        const TILE_MANIFEST = '__TILE_MANIFEST__'; // Empty unless the data is split into tiles
+
+        function chooseRenderMode(count) {
+            if (RENDER_MODE !== 'auto') return RENDER_MODE;
+            return count > CLUSTER_AUTO_THRESHOLD ? 'clusters' : 'markers';
+        }
+
+        // Canvas and cluster modes draw restaurants as circles on one shared
+        // canvas instead of one DOM element per marker
+        const canvasRenderer = L.canvas({ padding: 0.5 });
+        const pointStyle = {
+            renderer: canvasRenderer,
+            radius: 6,
+            color: 'white',
+            weight: 1,
+            fillColor: '#2196F3',
+            fillOpacity: 0.9
+        };
+
+        function clusterMarker(cluster, map, zoom) {
+            const size = cluster.count < 10 ? 30 : cluster.count < 100 ? 36 : 44;
+            return L.marker([cluster.lat, cluster.lng], {
+                icon: L.divIcon({ html: String(cluster.count), className: 'cluster-icon', iconSize: [size, size] })
+            }).on('click', () => map.setView([cluster.lat, cluster.lng], zoom + 2));
+        }
+
+        // Every marker shares one icon instead of creating its own
+        const markerIcon = L.icon({
+            iconUrl: 'https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-blue.png',
+            shadowUrl: 'https://cdnjs.cloudflare.com/ajax/libs/leaflet/0.7.7/images/marker-shadow.png',
+            iconSize: [25, 41],
+            iconAnchor: [12, 41],
+            popupAnchor: [1, -34],
+            shadowSize: [41, 41]
+        });
+
+        // Filter-to-paint latency: every filter change records the time from
+        // the start of the marker update to the next painted frame. Run
+        // `await mapBenchmark.run()` in the console to time every cuisine filter.
+        const mapBenchmark = {
+            samples: [],
+            onSample: null,
+            run: null, // Set by RestaurantMap once the data is loaded
+            record(ms) {
+                this.samples.push(ms);
+                if (this.onSample) this.onSample(ms);
+            },
+            summary() {
+                const sorted = [...this.samples].sort((a, b) => a - b);
+                const percentile = p => sorted[Math.min(sorted.length - 1, Math.floor(p * sorted.length))];
+                return { count: sorted.length, p50: percentile(0.5), p95: percentile(0.95), max: sorted[sorted.length - 1] };
+            }
+        };
+        window.mapBenchmark = mapBenchmark;
 
         function RestaurantMap() {
             const [restaurantsData, setRestaurantsData] = useState([]);
+            const [filterIndex, setFilterIndex] = useState(null);
             const [selectedCuisine, setSelectedCuisine] = useState('all');
             const [searchText, setSearchText] = useState('');
+            const [debouncedSearch, setDebouncedSearch] = useState('');
             const [filteredRestaurants, setFilteredRestaurants] = useState([]);
             const [map, setMap] = useState(null);
-            const [markers, setMarkers] = useState([]);
+            const [renderMode, setRenderMode] = useState('markers');
+            const [clusterIndex, setClusterIndex] = useState(null);
+            const markersRef = useRef([]);
+            const redrawRef = useRef(null);
+            // Tiles arrive one at a time, so don't fit the map to the first
+            // one; the manifest's extent is fit instead when it loads
+            const filterKeyRef = useRef(!inlineData && TILE_MANIFEST ? 'all\\n' : null);
+            const visibleIdsRef = useRef(new Set());
+            const selectedCuisineRef = useRef('all');
             const [isMinimized, setIsMinimized] = useState(false);
             const mapContainerRef = useRef(null);
             const panelRef = useRef(null);
             const dragStartY = useRef(0);
             const dragStartMinimized = useRef(false);
 
-            // Load restaurant data from JSON file
+            // Load restaurant data from the page or from JSON files
             useEffect(() => {
-                console.log('Fetching restaurant data...');
-                fetch('restaurants.json')
-                    .then(response => {
-                        console.log('Response received:', response);
-                        return response.json();
+                if (!inlineData && TILE_MANIFEST) return; // Loaded tile by tile below
+                let loadRestaurants;
+                let loadIndex;
+                if (inlineData) {
+                    console.log('Reading embedded restaurant data...');
+                    loadRestaurants = inlineData.then(inline => inline.restaurants);
+                    loadIndex = inlineData.then(inline => inline.index);
+                } else {
+                    console.log('Fetching restaurant data...');
+                    loadIndex = fetchOptionalJson('restaurants_index.json');
+                    loadRestaurants = fetch('restaurants.json')
+                        .then(response => {
+                            console.log('Response received:', response);
+                            return response.json();
+                        });
+                }
+                loadRestaurants
+                    .then(json => Promise.all([decodeRestaurants(json), loadIndex]))
+                    .then(([data, index]) => {
+                        const mode = chooseRenderMode(data.length);
+                        const loadClusters = mode !== 'clusters' ? null
+                            : inlineData ? inlineData.then(inline => inline.clusters || null)
+                            : fetchOptionalJson('restaurants_clusters.json');
+                        return Promise.all([data, index, mode, loadClusters]);
                     })
-                    .then(data => {
+                    .then(([data, index, mode, clusters]) => {
                         console.log('Data loaded successfully!');
                         console.log('Number of restaurants:', data.length);
                         console.log('First restaurant:', data[0]);
+                        // Ignore an index left over from a different restaurants.json
+                        const usableIndex = index && index.count === data.length ? index : null;
+                        console.log('Filter index:', usableIndex ? 'loaded' : 'not available');
+                        const usableClusters = clusters && clusters.count === data.length ? decodeClusters(clusters) : null;
+                        console.log('Render mode:', mode, mode === 'clusters' && !usableClusters ? '(no clusters available)' : '');
+                        setRenderMode(mode);
+                        setClusterIndex(usableClusters);
+                        setFilterIndex(usableIndex);
                         setRestaurantsData(data);
                         setFilteredRestaurants(data);
                     })
@@ -550,7 +2840,10 @@ def generate_html_map():
                     });
             }, []);
 
-            const cuisines = [...new Set(restaurantsData.map(r => r.Cuisine))].sort();
+            const cuisines = useMemo(
+                () => filterIndex ? filterIndex.cuisines : [...new Set(restaurantsData.map(r => r.Cuisine))].sort(),
+                [restaurantsData, filterIndex]
+            );
 
             // Initialize map
             useEffect(() => {
@@ -587,77 +2880,229 @@ def generate_html_map():
                 };
             }, []);
 
+            // Only filter once typing pauses
+            useEffect(() => {
+                const timer = setTimeout(() => setDebouncedSearch(searchText), SEARCH_DEBOUNCE_MS);
+                return () => clearTimeout(timer);
+            }, [searchText]);
+
+            // With generate_html_map(tiles_dir=...), load only the geohash tiles
+            // in view, adding each tile's restaurants as it arrives
+            useEffect(() => {
+                if (!map || inlineData || !TILE_MANIFEST) return;
+
+                const tilesUrl = TILE_MANIFEST.slice(0, TILE_MANIFEST.lastIndexOf('/') + 1);
+                const requested = new Set();
+                let manifest = null;
+
+                const loadVisibleTiles = () => {
+                    if (!manifest) return;
+                    const view = map.getBounds().pad(0.25);
+                    manifest.tiles.forEach(tile => {
+                        const [south, west, north, east] = tile.bounds;
+                        if (requested.has(tile.hash) || !view.intersects(L.latLngBounds([south, west], [north, east]))) return;
+
+                        requested.add(tile.hash);
+                        fetch(`${tilesUrl}${tile.hash}.json`)
+                            .then(response => response.json())
+                            .then(json => {
+                                const rows = decodeRestaurants(json);
+                                console.log('Loaded tile', tile.hash, 'with', rows.length, 'restaurants');
+                                setRestaurantsData(previous => previous.concat(rows));
+                            })
+                            .catch(error => {
+                                console.error('Error loading tile', tile.hash, error);
+                                requested.delete(tile.hash); // Try again on the next move
+                            });
+                    });
+                };
+
+                console.log('Fetching tile manifest...');
+                fetch(TILE_MANIFEST)
+                    .then(response => response.json())
+                    .then(json => {
+                        manifest = json;
+                        console.log('Tiles:', manifest.tiles.length, 'with', manifest.count, 'restaurants');
+                        setRenderMode(chooseRenderMode(manifest.count));
+                        if (window.innerWidth > 768 && manifest.tiles.length > 0) {
+                            // Fit to the whole dataset (only on desktop); loads the tiles in view on moveend
+                            const extent = L.latLngBounds([]);
+                            manifest.tiles.forEach(tile => {
+                                const [south, west, north, east] = tile.bounds;
+                                extent.extend(L.latLngBounds([south, west], [north, east]));
+                            });
+                            map.fitBounds(extent, { padding: [50, 50] });
+                        }
+                        loadVisibleTiles();
+                    })
+                    .catch(error => {
+                        console.error('Error loading tile manifest:', error);
+                    });
+                map.on('moveend', loadVisibleTiles);
+
+                return () => {
+                    map.off('moveend', loadVisibleTiles);
+                };
+            }, [map]);
+
+            // Create one marker per restaurant as the data arrives; filter
+            // changes below only show or hide them. Rows are only ever
+            // appended (by tiles), so existing markers are kept.
+            useEffect(() => {
+                const markers = markersRef.current;
+                if (!map || restaurantsData.length <= markers.length) return;
+
+                console.log('Creating markers for', restaurantsData.length - markers.length, 'restaurants');
+                restaurantsData.slice(markers.length).forEach(restaurant => markers.push(
+                    (renderMode === 'markers'
+                        ? L.marker([restaurant.Latitude, restaurant.Longitude], { icon: markerIcon })
+                        : L.circleMarker([restaurant.Latitude, restaurant.Longitude], pointStyle))
+                        .bindTooltip(() => `
+                            <div style="font-family: Arial; font-size: 12px;">
+                                <strong>${restaurant.Restaurant}</strong><br>
+                                <em>Cuisine:</em> ${restaurant.Cuisine}<br>
+                                <em>Address:</em> ${restaurant.Address}
+                            </div>
+                        `, {
+                            permanent: false,
+                            direction: 'top',
+                            opacity: 0.9
+                        })
+                ));
+            }, [map, restaurantsData, renderMode]);
+
+            // Start over when the map or render mode changes
+            useEffect(() => () => {
+                markersRef.current.forEach(marker => map.removeLayer(marker));
+                markersRef.current = [];
+                visibleIdsRef.current = new Set();
+            }, [map, renderMode]);
+
+            // In cluster mode, draw only what's in view, redrawing after every
+            // pan or zoom: clusters up to the last clustered zoom, then the
+            // individual restaurants
+            useEffect(() => {
+                if (!map || renderMode !== 'clusters' || restaurantsData.length === 0) return;
+
+                const layer = L.layerGroup().addTo(map);
+                const clustersByZoom = new Map(); // For the current filter
+                let clusteredIds = null;
+
+                const redraw = () => {
+                    const visible = visibleIdsRef.current;
+                    if (visible !== clusteredIds) {
+                        clustersByZoom.clear();
+                        clusteredIds = visible;
+                    }
+
+                    const zoom = Math.round(map.getZoom());
+                    const bounds = map.getBounds().pad(0.25);
+                    const markers = markersRef.current;
+                    layer.clearLayers();
+
+                    if (!clusterIndex || zoom > clusterIndex.maxZoom) {
+                        visible.forEach(id => {
+                            if (bounds.contains(markers[id].getLatLng())) layer.addLayer(markers[id]);
+                        });
+                        return;
+                    }
+
+                    if (!clustersByZoom.has(zoom)) {
+                        const ids = visible.size === restaurantsData.length ? null : [...visible];
+                        clustersByZoom.set(zoom, clustersAtZoom(clusterIndex, zoom, restaurantsData, ids));
+                    }
+                    clustersByZoom.get(zoom).forEach(cluster => {
+                        if (!bounds.contains([cluster.lat, cluster.lng])) return;
+                        layer.addLayer(cluster.count === 1 ? markers[cluster.id] : clusterMarker(cluster, map, zoom));
+                    });
+                };
+
+                redrawRef.current = redraw;
+                map.on('moveend', redraw);
+
+                return () => {
+                    map.off('moveend', redraw);
+                    redrawRef.current = null;
+                    map.removeLayer(layer);
+                };
+            }, [map, renderMode, clusterIndex, restaurantsData]);
+
             // Update markers when filters change
             useEffect(() => {
-                console.log('Marker update effect triggered');
-                console.log('Map exists?', !!map);
-                console.log('Restaurant data length:', restaurantsData.length);
-                
                 if (!map || restaurantsData.length === 0) {
                     console.log('Returning early - map or data not ready');
                     return;
                 }
 
-                const filtered = restaurantsData.filter(restaurant => {
-                    const cuisineMatch = selectedCuisine === 'all' || restaurant.Cuisine === selectedCuisine;
-                    const searchMatch = searchText === '' || restaurant.Restaurant.toLowerCase().includes(searchText.toLowerCase());
-                    return cuisineMatch && searchMatch;
-                });
+                const started = performance.now();
+                selectedCuisineRef.current = selectedCuisine;
+                const ids = filterRestaurantIds(restaurantsData, filterIndex, selectedCuisine, debouncedSearch);
+                const filtered = ids.map(id => restaurantsData[id]);
 
                 console.log('Filtered restaurants:', filtered.length);
-                console.log('First filtered restaurant:', filtered[0]);
                 setFilteredRestaurants(filtered);
 
-                // Clear existing markers
-                console.log('Clearing', markers.length, 'existing markers');
-                markers.forEach(marker => map.removeLayer(marker));
-
-                // Create new markers
-                console.log('Creating markers for', filtered.length, 'restaurants');
-                const newMarkers = filtered.map((restaurant, index) => {
-                    if (index < 3) {
-                        console.log(`Creating marker ${index}:`, restaurant.Restaurant, 'at', restaurant.Latitude, restaurant.Longitude);
-                    }
-                    
-                    const marker = L.marker([restaurant.Latitude, restaurant.Longitude], {
-                        icon: L.icon({
-                            iconUrl: 'https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-blue.png',
-                            shadowUrl: 'https://cdnjs.cloudflare.com/ajax/libs/leaflet/0.7.7/images/marker-shadow.png',
-                            iconSize: [25, 41],
-                            iconAnchor: [12, 41],
-                            popupAnchor: [1, -34],
-                            shadowSize: [41, 41]
-                        })
-                    }).addTo(map);
-
-                    marker.bindTooltip(`
-                        <div style="font-family: Arial; font-size: 12px;">
-                            <strong>${restaurant.Restaurant}</strong><br>
-                            <em>Cuisine:</em> ${restaurant.Cuisine}<br>
-                            <em>Address:</em> ${restaurant.Address}
-                        </div>
-                    `, {
-                        permanent: false,
-                        direction: 'top',
-                        opacity: 0.9
+                const markers = markersRef.current;
+                const wasVisible = visibleIdsRef.current;
+                const isVisible = new Set(ids);
+                visibleIdsRef.current = isVisible;
+                if (redrawRef.current) {
+                    // Cluster mode draws only what's in view
+                    redrawRef.current();
+                } else {
+                    // Add or remove only the markers whose visibility changed
+                    let removed = 0;
+                    let added = 0;
+                    wasVisible.forEach(id => {
+                        if (!isVisible.has(id)) {
+                            map.removeLayer(markers[id]);
+                            removed++;
+                        }
                     });
+                    isVisible.forEach(id => {
+                        if (!wasVisible.has(id)) {
+                            markers[id].addTo(map);
+                            added++;
+                        }
+                    });
+                    console.log('Markers added:', added, 'removed:', removed);
+                }
 
-                    return marker;
-                });
-
-                console.log('Created', newMarkers.length, 'markers');
-                setMarkers(newMarkers);
-
-                // Fit bounds to markers (only on desktop)
-                if (filtered.length > 0) {
+                // Fit bounds to markers when the filters change (only on desktop)
+                const filterKey = `${selectedCuisine}\\n${debouncedSearch}`;
+                const filtersChanged = filterKey !== filterKeyRef.current;
+                filterKeyRef.current = filterKey;
+                if (filtered.length > 0 && filtersChanged) {
                     const isMobile = window.innerWidth <= 768;
                     if (!isMobile) {
                         const bounds = L.latLngBounds(filtered.map(r => [r.Latitude, r.Longitude]));
-                        console.log('Fitting map to bounds:', bounds);
                         map.fitBounds(bounds, { padding: [50, 50] });
                     }
                 }
-            }, [map, selectedCuisine, searchText, restaurantsData]);
+
+                requestAnimationFrame(() => requestAnimationFrame(() => {
+                    mapBenchmark.record(performance.now() - started);
+                }));
+            }, [map, selectedCuisine, debouncedSearch, restaurantsData, filterIndex, renderMode]);
+
+            // Let the console benchmark step through every cuisine filter
+            useEffect(() => {
+                mapBenchmark.run = async () => {
+                    mapBenchmark.samples = [];
+                    let previous = selectedCuisineRef.current;
+                    for (const cuisine of [...cuisines, 'all']) {
+                        if (cuisine === previous) continue; // Wouldn't trigger an update
+                        const painted = new Promise(resolve => { mapBenchmark.onSample = resolve; });
+                        setSelectedCuisine(cuisine);
+                        await painted;
+                        previous = cuisine;
+                    }
+                    mapBenchmark.onSample = null;
+                    const summary = mapBenchmark.summary();
+                    console.table(summary);
+                    return summary;
+                };
+            }, [cuisines]);
 
             const handleReset = () => {
                 setSelectedCuisine('all');
@@ -692,128 +3137,146 @@ def generate_html_map():
                 setIsMinimized(!isMinimized);
             };
 
-            return (
-                <div style={{ width: '100%', height: '100%', position: 'relative' }}>
-                    <div
-                        ref={mapContainerRef}
-                        style={{
-                            position: 'absolute',
-                            top: 0,
-                            bottom: 0,
-                            left: 0,
-                            right: 0
-                        }}
-                    />
-
-                    <div 
-                        ref={panelRef}
-                        className={`filter-panel ${isMinimized ? 'minimized' : ''}`}
-                    >
-                        <div 
-                            className="drag-handle"
-                            onTouchStart={handleDragStart}
-                            onTouchMove={handleDragMove}
-                            onTouchEnd={handleDragEnd}
-                            onMouseDown={handleDragStart}
-                            onMouseMove={handleDragMove}
-                            onMouseUp={handleDragEnd}
-                            onClick={toggleMinimize}
-                        >
-                            <h3 style={{ margin: '0', fontSize: '18px', color: '#333' }}>
-                                <strong>NYC Restaurant Week 2026</strong><br />
-                                <span style={{ fontSize: '15px', fontWeight: 'normal' }}>Jan. 20th - Feb. 12th</span>
-                            </h3>
-                        </div>
-
-                        <div className="filter-content" style={{ padding: '15px' }}>
-                            <h3 style={{ margin: '0 0 10px 0', fontSize: '20px', color: '#333', display: 'block' }} className="desktop-title">
-                                <strong>NYC Restaurant Week 2026</strong><br />
-                                <span style={{ fontSize: '16px', fontWeight: 'normal' }}>Jan. 20th - Feb. 12th</span>
-                            </h3>
-                            <label style={{ display: 'block', margin: '10px 0 5px 0', fontWeight: 'bold', fontSize: '14px' }}>
-                                Filter by Cuisine:
-                            </label>
-                            <select
-                                value={selectedCuisine}
-                                onChange={(e) => setSelectedCuisine(e.target.value)}
-                                style={{
-                                    width: '100%',
-                                    padding: '8px',
-                                    border: '1px solid #ddd',
-                                    borderRadius: '4px',
-                                    fontSize: '14px'
-                                }}
-                            >
-                                <option value="all">All Cuisines</option>
-                                {cuisines.map(cuisine => (
-                                    <option key={cuisine} value={cuisine}>{cuisine}</option>
-                                ))}
-                            </select>
-
-                            <label style={{ display: 'block', margin: '10px 0 5px 0', fontWeight: 'bold', fontSize: '14px' }}>
-                                Search Restaurant:
-                            </label>
-                            <input
-                                type="text"
-                                value={searchText}
-                                onChange={(e) => setSearchText(e.target.value)}
-                                placeholder="Type restaurant name..."
-                                style={{
-                                    width: '100%',
-                                    padding: '8px',
-                                    border: '1px solid #ddd',
-                                    borderRadius: '4px',
-                                    fontSize: '14px'
-                                }}
-                            />
-
-                            <button
-                                onClick={handleReset}
-                                style={{
-                                    width: '100%',
-                                    padding: '10px',
-                                    marginTop: '10px',
-                                    background: '#64B5F6',
-                                    color: 'white',
-                                    border: 'none',
-                                    borderRadius: '4px',
-                                    cursor: 'pointer',
-                                    fontSize: '14px',
-                                    fontWeight: 'bold'
-                                }}
-                            >
-                                Reset Filters
-                            </button>
-
-                            <div className="info-text" style={{
+            const titleBlock = (subtitleSize, props) => h('h3', props,
+                h('strong', null, 'NYC Restaurant Week 2026'),
+                h('br'),
+                h('span', { style: { fontSize: subtitleSize, fontWeight: 'normal' } }, 'Jan. 20th - Feb. 12th')
+            );
+
+            return h('div', { style: { width: '100%', height: '100%', position: 'relative' } },
+                h('div', {
+                    ref: mapContainerRef,
+                    style: {
+                        position: 'absolute',
+                        top: 0,
+                        bottom: 0,
+                        left: 0,
+                        right: 0
+                    }
+                }),
+
+                h('div', {
+                    ref: panelRef,
+                    className: `filter-panel ${isMinimized ? 'minimized' : ''}`
+                },
+                    h('div', {
+                        className: 'drag-handle',
+                        onTouchStart: handleDragStart,
+                        onTouchMove: handleDragMove,
+                        onTouchEnd: handleDragEnd,
+                        onMouseDown: handleDragStart,
+                        onMouseMove: handleDragMove,
+                        onMouseUp: handleDragEnd,
+                        onClick: toggleMinimize
+                    },
+                        titleBlock('15px', { style: { margin: '0', fontSize: '18px', color: '#333' } })
+                    ),
+
+                    h('div', { className: 'filter-content', style: { padding: '15px' } },
+                        titleBlock('16px', {
+                            style: { margin: '0 0 10px 0', fontSize: '20px', color: '#333', display: 'block' },
+                            className: 'desktop-title'
+                        }),
+                        h('label', { style: { display: 'block', margin: '10px 0 5px 0', fontWeight: 'bold', fontSize: '14px' } },
+                            'Filter by Cuisine:'
+                        ),
+                        h('select', {
+                            value: selectedCuisine,
+                            onChange: (e) => setSelectedCuisine(e.target.value),
+                            style: {
+                                width: '100%',
+                                padding: '8px',
+                                border: '1px solid #ddd',
+                                borderRadius: '4px',
+                                fontSize: '14px'
+                            }
+                        },
+                            h('option', { value: 'all' }, 'All Cuisines'),
+                            cuisines.map(cuisine => h('option', { key: cuisine, value: cuisine }, cuisine))
+                        ),
+
+                        h('label', { style: { display: 'block', margin: '10px 0 5px 0', fontWeight: 'bold', fontSize: '14px' } },
+                            'Search Restaurant:'
+                        ),
+                        h('input', {
+                            type: 'text',
+                            value: searchText,
+                            onChange: (e) => setSearchText(e.target.value),
+                            placeholder: 'Type restaurant name...',
+                            style: {
+                                width: '100%',
+                                padding: '8px',
+                                border: '1px solid #ddd',
+                                borderRadius: '4px',
+                                fontSize: '14px'
+                            }
+                        }),
+
+                        h('button', {
+                            onClick: handleReset,
+                            style: {
+                                width: '100%',
+                                padding: '10px',
+                                marginTop: '10px',
+                                background: '#64B5F6',
+                                color: 'white',
+                                border: 'none',
+                                borderRadius: '4px',
+                                cursor: 'pointer',
+                                fontSize: '14px',
+                                fontWeight: 'bold'
+                            }
+                        }, 'Reset Filters'),
+
+                        h('div', {
+                            className: 'info-text',
+                            style: {
                                 fontSize: '12px',
                                 color: '#666',
                                 marginTop: '10px',
                                 paddingTop: '10px',
                                 borderTop: '1px solid #eee'
-                            }}>
-                                Showing <strong style={{ color: '#2196F3' }}>{filteredRestaurants.length}</strong> restaurants
-                            </div>
-                        </div>
-                    </div>
-                </div>
+                            }
+                        },
+                            'Showing ', h('strong', { style: { color: '#2196F3' } }, filteredRestaurants.length), ' restaurants'
+                        )
+                    )
+                )
             );
         }
 
-        ReactDOM.render(<RestaurantMap />, document.getElementById('root'));
+        ReactDOM.render(h(RestaurantMap), document.getElementById('root'));
     </script>
 </body>
 </html>'''
+    html_content = (html_content
+                    .replace('__RENDER_MODE__', render_mode)
+                    .replace('__CLUSTER_AUTO_THRESHOLD__', str(CLUSTER_AUTO_THRESHOLD))
+                    .replace('__TILE_MANIFEST__', f"{tiles_dir}/manifest.json" if tiles_dir is not None else ''))
+    check_map_script(html_content)
+    
+    if inline_data is not None:
+        if isinstance(inline_data, str):
+            inline_data = load_restaurants_json(inline_data)
+        inline_data = inline_data.dropna(subset=["Latitude", "Longitude"]).reset_index(drop=True)
+        html_content = html_content.replace('__INLINE_DATA__', inline_data_tag(inline_data, render_mode, compress_inline))
+    else:
+        html_content = html_content.replace('    __INLINE_DATA__\n', '')
+    if bundle:
+        html_content = bundle_map_html(html_content)
     
-    output_file = "restaurant_map.html"
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write(html_content)
+    METRICS.record_file(output_file)
     
-    print(f"✓ Generated interactive HTML map")
-    print(f"✓ Saved to: {output_file}")
+    print(f"✓ Generated interactive HTML map{' (bundled)' if bundle else ''}")
+    print(f"✓ Saved to: {output_file} ({os.path.getsize(output_file) / 1024:.1f} KB)")
     print(f"\nTo view the map:")
-    print(f"  1. Make sure 'restaurants.json' is in the same directory")
-    print(f"  2. Open '{output_file}' in a web browser")
+    if inline_data is not None:
+        print(f"  Open '{output_file}' in a web browser (the restaurant data is embedded)")
+    else:
+        print(f"  1. Make sure '{tiles_dir or 'restaurants.json'}' is in the same directory")
+        print(f"  2. Open '{output_file}' in a web browser")
     
     return output_file
 
@@ -822,20 +3285,125 @@ def generate_html_map():
 # MAIN PIPELINE
 # ============================================================================
 
-def run_pipeline(api_key=None):
-    """Run the complete pipeline."""
+class Pipeline:
+    """Chains the pipeline stages on one in-memory DataFrame.
+    
+    Each stage hands its DataFrame straight to the next, so nothing is
+    written out and parsed back between steps. Snapshots of intermediate
+    results are still saved under the usual CSV names (in `output_dir`, if
+    given) unless `snapshots` is False; with `async_snapshots` they're
+    written on a background thread while the next stage runs.
+    """
+    
+    def __init__(self, snapshots=True, async_snapshots=False, output_dir=None):
+        self.df = None
+        self.snapshots = snapshots
+        self.output_dir = output_dir or ""
+        self.writer = ThreadPoolExecutor(max_workers=1) if async_snapshots else None
+        self.pending = []
+    
+    def run(self, stage, *args, snapshot=None, **kwargs):
+        """Replace the current DataFrame with `stage(df, *args, **kwargs)`.
+        
+        Stages return a new DataFrame rather than modifying their input, so
+        a snapshot still being written in the background is never changed.
+        """
+        
+        with METRICS.stage(stage.__name__) as record:
+            self.df = stage(self.df, *args, **kwargs)
+            record["rows"] = len(self.df)
+        if snapshot is not None:
+            self.save(snapshot)
+        return self.df
+    
+    def save(self, output_file):
+        """Snapshot the current DataFrame to CSV, if snapshots are enabled."""
+        
+        if not self.snapshots:
+            return
+        output_file = os.path.join(self.output_dir, output_file)
+        if self.writer is None:
+            write_csv(self.df, output_file)
+        else:
+            self.pending.append(self.writer.submit(write_csv, self.df, output_file))
+    
+    def close(self):
+        """Wait for background snapshot writes to finish."""
+        
+        for future in self.pending:
+            future.result()
+        self.pending = []
+        if self.writer is not None:
+            self.writer.shutdown()
+
+
+def run_pipeline(api_key=None, cache_file=CACHE_FILE, fused=True, incremental=False,
+                 previous_json="restaurants.json", snapshots=True, async_snapshots=False,
+                 compact_json=False, render_mode=RENDER_MODE, bundle_map=False, inline_data=False,
+                 compress_inline=False, tiles_dir=None, report_file="run_report.json", profile_file=None,
+                 streaming=False, base_url=BASE_URL, city_suffix=CITY_SUFFIX, output_dir=None,
+                 review_rules=REVIEW_RULES_FILE, manual_review=False, validate=None, history_json=()):
+    """Run the complete pipeline.
+    
+    Places and Geocoding results are cached in `cache_file` so re-runs only
+    pay for restaurants that weren't looked up before. Pass None to disable.
+    With `fused`, addresses and coordinates come from one Places call per
+    restaurant; set it to False to run the separate Geocoding step.
+    With `incremental`, only restaurants that aren't in `previous_json` go
+    through the append and API steps; the rest reuse their old locations.
+    Older restaurants.json files in `history_json` (e.g. past seasons) are
+    matched as well, and renamed restaurants are matched by fuzzy name
+    matching (see split_new_restaurants()).
+    Stages pass their data along in memory; `snapshots` and
+    `async_snapshots` control the intermediate CSV files (see Pipeline).
+    `compact_json` writes restaurants.json in the compact columnar format,
+    with precompressed .gz/.br copies. `render_mode` and `bundle_map` are
+    passed to generate_html_map(); with `inline_data`, the restaurants are
+    embedded in the map page (gzipped if `compress_inline`). With
+    `tiles_dir`, the data is also split into geohash tiles that the map
+    loads as they come into view.
+    Per-stage timings, HTTP and cache counters and output sizes are
+    written to `report_file` (None to skip); with `profile_file`, the run
+    is profiled with cProfile and the stats saved there (view them with
+    `python -m pstats <file>`).
+    With `streaming`, steps 1-4 run concurrently on bounded queues (see
+    stream_restaurants()) instead of one after another; there's no manual
+    review pause, and it can't be combined with `incremental`.
+    The scraped data is corrected with the `review_rules` file (see
+    review_restaurants()); set `manual_review` to also pause after that so
+    the CSV can be edited by hand before the API steps.
+    `base_url` is the listing to scrape and `city_suffix` what's appended
+    to its neighborhoods. With `output_dir`, every file is written there
+    instead of the working directory (relative paths such as
+    `previous_json` are read from there too; `cache_file`, `review_rules`
+    and `history_json` aren't). The coordinate checks only know NYC, so by
+    default (`validate=None`) they're skipped when `city_suffix` is another
+    city's; set `validate` to True or False to override.
+    Returns the map's path, or None if the pipeline failed.
+    """
+    
+    if streaming and incremental:
+        raise ValueError("streaming and incremental modes can't be combined")
+    # Checked again by generate_html_map(), but fail before the scrape and the paid API calls
+    if render_mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode: {render_mode!r} (use 'markers', 'canvas', 'clusters' or 'auto')")
+    if inline_data and tiles_dir is not None:
+        raise ValueError("inline_data and tiles_dir can't be combined")
+    if validate is None:
+        validate = city_suffix == CITY_SUFFIX
     
     print("\n" + "=" * 80)
     print("NYC RESTAURANT WEEK DATA PIPELINE")
     print("=" * 80)
     print("\nThis pipeline will:")
     print("1. Scrape restaurant data from NYC Tourism website")
-    print("2. Pause for manual data review and corrections")
+    print("2. Apply the review rules (and pause for manual corrections, if enabled)")
     print("3. Append ', New York, NY' to neighborhoods")
     print("4. Fetch addresses via Google Places API")
-    print("5. Fetch coordinates via Google Geocoding API")
-    print("6. Convert final data to JSON for the interactive map")
-    print("7. Generate interactive HTML map with React")
+    print("5. Fetch coordinates from the Places results (Geocoding API as fallback)")
+    print("6. Check the coordinates and re-geocode suspect locations")
+    print("7. Convert final data to JSON for the interactive map")
+    print("8. Generate interactive HTML map with React")
     print("\n" + "=" * 80)
     
     # Check if API key is provided
@@ -847,30 +3415,106 @@ def run_pipeline(api_key=None):
     else:
         use_api = True
     
+    def output_path(name):
+        return name and os.path.join(output_dir or "", name)
+    
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    
+    cache = GeocodeCache(cache_file) if use_api and cache_file else None
+    pipeline = Pipeline(snapshots, async_snapshots, output_dir)
+    METRICS.reset()
+    profiler = cProfile.Profile() if profile_file else None
+    if profiler is not None:
+        profiler.enable()
+    
+    html_file = None
     try:
-        # Step 1: Scrape data
-        csv_file = scrape_restaurant_week()
-        
-        # Step 1.5: Manual review checkpoint
-        csv_file = manual_review_checkpoint(csv_file)
-        
-        # Step 2: Append city to neighborhoods
-        csv_file = append_city_to_neighborhoods(csv_file)
-        
-        if use_api:
-            # Step 3: Fetch addresses
-            csv_file = fetch_addresses(csv_file, api_key)
-            
-            # Step 4: Fetch coordinates
-            csv_file = fetch_coordinates(csv_file, api_key)
+        if streaming:
+            # Steps 1-4: Scrape, append and look up as one stream
+            with METRICS.stage("stream_restaurants") as record:
+                pipeline.df = stream_restaurants(
+                    api_key if use_api else None, cache, fused, base_url,
+                    output_file=output_path("restaurants_with_coordinates.csv"), city_suffix=city_suffix,
+                    review_rules=review_rules, changes_file=output_path("review_changes.csv"),
+                    journal_file=output_path("restaurants_streamed.journal")
+                )
+                record["rows"] = len(pipeline.df)
         else:
-            print("\n⚠ Skipping API steps (no API key provided)")
+            # Step 1: Scrape data
+            with METRICS.stage("scrape_restaurants") as record:
+                scraped = scrape_restaurants(base_url=base_url)
+                record["rows"] = len(scraped)
+            
+            # Step 1.5: Apply the review rules
+            with METRICS.stage("review_restaurants") as record:
+                pipeline.df = review_restaurants(scraped, review_rules, output_path("review_changes.csv"))
+                record["rows"] = len(pipeline.df)
+            
+            # Optional manual review checkpoint (the only step that reads its input back from disk)
+            if manual_review:
+                csv_file = write_csv(pipeline.df, output_path('nyc_restaurant_week.csv'))
+                with METRICS.stage("manual_review_checkpoint"):
+                    csv_file = manual_review_checkpoint(csv_file)
+                pipeline.df = read_csv(csv_file)
+            else:
+                pipeline.save('nyc_restaurant_week.csv')
+            scraped = pipeline.df
+            
+            if incremental:
+                with METRICS.stage("split_new_restaurants"):
+                    pipeline.df, known = split_new_restaurants(scraped, output_path(previous_json), city_suffix,
+                                                               history_json)
+            
+            if pipeline.df.empty:
+                print("\n✓ No new restaurants, skipping API steps")
+            else:
+                # Step 2: Append city to neighborhoods
+                pipeline.run(append_city, city_suffix, snapshot="nyc_restaurants_nyc.csv")
+                
+                if use_api and fused:
+                    # Steps 3+4: Fetch addresses and coordinates together
+                    pipeline.run(lookup_addresses_and_coordinates, api_key, cache,
+                                 journal_file=output_path("restaurants_resolved.journal"),
+                                 snapshot="restaurants_with_coordinates.csv")
+                elif use_api:
+                    # Step 3: Fetch addresses
+                    pipeline.run(lookup_addresses, api_key, cache,
+                                 journal_file=output_path("restaurants_with_addresses.journal"),
+                                 snapshot="restaurants_with_addresses.csv")
+                    
+                    # Step 4: Fetch coordinates
+                    pipeline.run(lookup_coordinates, api_key, cache,
+                                 journal_file=output_path("restaurants_with_coordinates.journal"),
+                                 snapshot="restaurants_with_coordinates.csv")
+                else:
+                    print("\n⚠ Skipping API steps (no API key provided)")
+            
+            if incremental:
+                resolved = pipeline.df if use_api else None
+                with METRICS.stage("merge_new_restaurants"):
+                    pipeline.df = merge_new_restaurants(scraped, known, resolved, city_suffix)
+                pipeline.save("restaurants_with_coordinates.csv")
+        
+        # Step 4.5: Validate coordinates, re-geocoding suspects
+        if validate and "Latitude" in pipeline.df:
+            pipeline.run(check_coordinates, api_key if use_api else None, cache,
+                         suspects_file=output_path("suspect_coordinates.csv"), snapshot="restaurants_validated.csv")
+        elif city_suffix != CITY_SUFFIX:
+            print(f"\nℹ Skipping the coordinate checks (they only cover New York, not '{city_suffix}')")
         
         # Step 5: Convert to JSON
-        json_file = convert_csv_to_json(csv_file)
+        with METRICS.stage("write_restaurants_json"):
+            json_file = write_restaurants_json(pipeline.df, output_path("restaurants.json"), compact_json,
+                                               compact_json, output_path("restaurants_index.json"),
+                                               output_path("restaurants_clusters.json"), output_path(tiles_dir))
         
         # Step 6: Generate HTML map
-        html_file = generate_html_map()
+        with METRICS.stage("generate_html_map"):
+            html_file = generate_html_map(render_mode, bundle=bundle_map,
+                                          inline_data=json_file if inline_data else None,
+                                          compress_inline=compress_inline, tiles_dir=tiles_dir,
+                                          output_file=output_path("restaurant_map.html"))
         
         print("\n" + "=" * 80)
         print("✓ PIPELINE COMPLETED SUCCESSFULLY!")
@@ -880,7 +3524,8 @@ def run_pipeline(api_key=None):
         print(f"  - Interactive map: {html_file}")
         print(f"\nTo view your interactive map:")
         print(f"  1. Open '{html_file}' in a web browser")
-        print(f"  2. Make sure '{json_file}' is in the same directory")
+        if not inline_data:
+            print(f"  2. Make sure '{json_file}' is in the same directory")
         
     except KeyboardInterrupt:
         print("\n\n✗ Pipeline interrupted by user")
@@ -888,6 +3533,18 @@ def run_pipeline(api_key=None):
         print(f"\n✗ Pipeline failed: {str(e)}")
         import traceback
         traceback.print_exc()
+    finally:
+        pipeline.close()
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(output_path(profile_file))
+            print(f"✓ Saved profile to: {output_path(profile_file)}")
+        if report_file is not None:
+            METRICS.write(output_path(report_file), cache)
+        if cache is not None:
+            cache.close()
+    
+    return html_file
 
 
 if __name__ == "__main__":
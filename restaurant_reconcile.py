@@ -0,0 +1,144 @@
+"""
+Restaurant Name Reconciliation
+==============================
+Matches restaurants whose names drift between scrapes or seasons
+("Tarallucci e Vino - Upper West Side" vs. "Tarallucci e Vino UWS"), so
+a renamed listing can reuse its earlier address and coordinates:
+
+    index = ReconcileIndex(previous["Restaurant"], previous["Neighborhood"])
+    ids, scores = index.match(scraped["Restaurant"], scraped["Neighborhood"])
+
+Names are reduced to a core (no accents, punctuation, stop words, or a
+trailing neighborhood or its initials) and compared by the share of
+character trigrams they have in common. Only restaurants in the same
+neighborhood that share a trigram are compared, so matching stays fast
+however many seasons are indexed. Neighborhoods are plain names,
+without the pipeline's city suffix.
+"""
+
+import re
+import timeit
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+MATCH_THRESHOLD = 0.8  # Minimum Dice similarity of two names' trigram sets
+NGRAM = 3
+STOP_WORDS = {"the", "restaurant", "nyc"}
+
+
+def words(text):
+    """Lowercase ASCII words of `text`, with "&" spelled out and apostrophes dropped."""
+    
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode().casefold()
+    text = text.replace("&", " and ").replace("'", "")
+    return re.sub(r"[^a-z0-9]+", " ", text).split()
+
+
+def core_name(name, neighborhood=""):
+    """The part of a restaurant's name that identifies it, for fuzzy matching.
+    
+    Trailing neighborhood names ("... - Upper West Side") and initials
+    ("... UWS") are removed, as are STOP_WORDS, unless nothing else is left.
+    """
+    
+    tokens = words(name)
+    place = words(neighborhood)
+    initials = "".join(word[0] for word in place) if len(place) > 1 else None
+    while True:
+        if place and len(tokens) > len(place) and tokens[-len(place):] == place:
+            tokens = tokens[:-len(place)]
+        elif len(tokens) > 1 and tokens[-1] == initials:
+            tokens = tokens[:-1]
+        else:
+            break
+    return " ".join([token for token in tokens if token not in STOP_WORDS] or tokens)
+
+
+def trigrams(core):
+    padded = f" {core} "
+    return {padded[i:i + NGRAM] for i in range(max(len(padded) - NGRAM + 1, 1))}
+
+
+class ReconcileIndex:
+    """Trigram index over restaurant names, blocked by neighborhood.
+    
+    `postings` maps (neighborhood, trigram) to the ids (positions in
+    `names`) of the restaurants with that trigram, so a query only scores
+    names from its own neighborhood that share at least one trigram.
+    """
+    
+    def __init__(self, names, neighborhoods):
+        self.blocks = [" ".join(words(neighborhood)) for neighborhood in neighborhoods]
+        self.cores = [core_name(name, neighborhood) for name, neighborhood in zip(names, neighborhoods)]
+        self.grams = [trigrams(core) for core in self.cores]
+        
+        self.postings = {}
+        for i, (block, grams) in enumerate(zip(self.blocks, self.grams)):
+            for gram in grams:
+                self.postings.setdefault((block, gram), []).append(i)
+    
+    def __len__(self):
+        return len(self.cores)
+    
+    def candidates(self, name, neighborhood, threshold=MATCH_THRESHOLD):
+        """(score, id) for every indexed name at least `threshold` similar, best first."""
+        
+        block = " ".join(words(neighborhood))
+        grams = trigrams(core_name(name, neighborhood))
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get((block, gram), ()))
+        
+        scores = [(2 * count / (len(grams) + len(self.grams[i])), i) for i, count in shared.items()]
+        return sorted([(score, i) for score, i in scores if score >= threshold], reverse=True)
+    
+    def match(self, names, neighborhoods, threshold=MATCH_THRESHOLD):
+        """Best indexed match for each query restaurant, each indexed restaurant used at most once.
+        
+        Returns (ids, scores) aligned with the queries; unmatched queries
+        get id -1 and score 0. Pairs are assigned greedily, best score first.
+        """
+        
+        names, neighborhoods = list(names), list(neighborhoods)
+        pairs = []
+        for query, (name, neighborhood) in enumerate(zip(names, neighborhoods)):
+            pairs += [(score, query, i) for score, i in self.candidates(name, neighborhood, threshold)]
+        
+        ids = np.full(len(names), -1, dtype=np.int64)
+        scores = np.zeros(len(names))
+        used = set()
+        for score, query, i in sorted(pairs, reverse=True):
+            if ids[query] < 0 and i not in used:
+                ids[query], scores[query] = i, score
+                used.add(i)
+        return ids, scores
+
+
+if __name__ == "__main__":
+    # Example: rename restaurants the way listings drift, and check they're found again
+    from nyc_restaurant_pipeline import CITY_SUFFIX, load_restaurants_json
+    
+    df = load_restaurants_json("restaurants.json")
+    neighborhoods = df["Neighborhood"].str.removesuffix(CITY_SUFFIX)
+    index = ReconcileIndex(df["Restaurant"], neighborhoods)
+    
+    def drift(i, name, neighborhood):
+        initials = "".join(word[0] for word in words(neighborhood)).upper()
+        if i % 3 == 0 or len(initials) < 2:
+            return f"{name} - {neighborhood}"
+        return f"The {name}" if i % 3 == 1 else f"{name} {initials}"
+    
+    drifted = [drift(i, name, hood) for i, (name, hood) in enumerate(zip(df["Restaurant"], neighborhoods))]
+    ids, scores = index.match(drifted, neighborhoods)
+    correct = (ids == np.arange(len(df))).sum()
+    print(f"✓ Matched {correct}/{len(df)} renamed restaurants to the right one ({(ids < 0).sum()} unmatched)")
+    
+    runs = 5
+    seconds = timeit.timeit(lambda: index.match(drifted, neighborhoods), number=runs)
+    print(f"⏱ match(): {seconds / runs * 1000:.1f} ms for {len(df)} restaurants")
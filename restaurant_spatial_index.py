@@ -0,0 +1,186 @@
+"""
+Restaurant Spatial Index
+========================
+Loads the pipeline's restaurants.json into a grid index backed by NumPy
+arrays, for fast nearest-N, bounding-box and radius queries:
+    
+    index = SpatialIndex.from_json("restaurants.json")
+    ids, distances = index.nearest(40.7580, -73.9855, n=5)
+    print(index.records(ids, distances))
+
+Positions are projected onto a flat plane around the data's mean latitude,
+which is accurate to well under 1% across a city.
+"""
+
+import math
+import timeit
+
+import numpy as np
+
+from nyc_restaurant_pipeline import load_restaurants_json
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+EARTH_RADIUS_M = 6_371_000
+CELL_SIZE_M = 250  # Grid cell width; about one city block group
+
+
+class SpatialIndex:
+    """Grid index over restaurant coordinates.
+    
+    Restaurants are bucketed into square cells `cell_size` meters wide.
+    `order` holds row ids sorted by cell, and `cells` maps each occupied
+    cell to its slice of `order`, so a query only looks at the restaurants
+    in the cells it overlaps. Query methods return row ids into `df`.
+    """
+    
+    def __init__(self, df, cell_size=CELL_SIZE_M):
+        self.df = df.dropna(subset=["Latitude", "Longitude"]).reset_index(drop=True)
+        self.lat = self.df["Latitude"].to_numpy(dtype=float)
+        self.lng = self.df["Longitude"].to_numpy(dtype=float)
+        self.cell_size = cell_size
+        self.cos_lat = math.cos(math.radians(self.lat.mean())) if len(self.df) else 1.0
+        self.x, self.y = self.project(self.lat, self.lng)
+        
+        cx = np.floor(self.x / cell_size).astype(np.int64)
+        cy = np.floor(self.y / cell_size).astype(np.int64)
+        self.order = np.lexsort((cy, cx))
+        
+        self.cells = {}
+        if len(self.df):
+            self.extent = (cx.min(), cx.max(), cy.min(), cy.max())
+            cells, starts, counts = np.unique(
+                np.stack([cx[self.order], cy[self.order]], axis=1), axis=0, return_index=True, return_counts=True
+            )
+            for (x, y), start, count in zip(cells.tolist(), starts.tolist(), counts.tolist()):
+                self.cells[(x, y)] = (start, start + count)
+        else:
+            self.extent = (0, -1, 0, -1)
+    
+    @classmethod
+    def from_json(cls, input_file="restaurants.json", cell_size=CELL_SIZE_M):
+        """Build an index over restaurants.json (either format)."""
+        
+        return cls(load_restaurants_json(input_file), cell_size)
+    
+    def project(self, lat, lng):
+        """Map latitude/longitude to x/y meters on the index's plane."""
+        
+        x = np.radians(lng) * EARTH_RADIUS_M * self.cos_lat
+        y = np.radians(lat) * EARTH_RADIUS_M
+        return x, y
+    
+    def cell(self, x, y):
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+    
+    def candidates(self, cells):
+        """Row ids of the restaurants in `cells`."""
+        
+        slices = [self.cells[cell] for cell in cells if cell in self.cells]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.order[start:end] for start, end in slices])
+    
+    def cells_in_box(self, x_min, y_min, x_max, y_max):
+        """Occupied cells overlapping a box in plane coordinates."""
+        
+        cx_min, cy_min = self.cell(x_min, y_min)
+        cx_max, cy_max = self.cell(x_max, y_max)
+        if (cx_max - cx_min + 1) * (cy_max - cy_min + 1) > len(self.cells):
+            # Cheaper to check every occupied cell than every cell in the box
+            return [(x, y) for x, y in self.cells if cx_min <= x <= cx_max and cy_min <= y <= cy_max]
+        return [(x, y) for x in range(cx_min, cx_max + 1) for y in range(cy_min, cy_max + 1)]
+    
+    def distances(self, ids, x, y):
+        return np.hypot(self.x[ids] - x, self.y[ids] - y)
+    
+    def nearest(self, lat, lng, n=5, max_distance=None):
+        """The `n` restaurants closest to a point.
+        
+        Returns (ids, distances in meters), closest first. Rings of cells
+        are searched outward from the point's cell until the n-th closest
+        restaurant found so far is nearer than any unsearched cell.
+        """
+        
+        x, y = self.project(lat, lng)
+        cx, cy = self.cell(x, y)
+        x_lo, x_hi, y_lo, y_hi = self.extent
+        ids = np.empty(0, dtype=np.int64)
+        # Rings closer than the nearest occupied cell are empty
+        ring = max(x_lo - cx, cx - x_hi, y_lo - cy, cy - y_hi, 0)
+        
+        while True:
+            if ring > 0 and 8 * ring > len(self.cells):
+                # Rings this big hold more cells than are occupied; just check everything
+                ids = np.arange(len(self.df))
+                break
+            if ring == 0:
+                ring_cells = [(cx, cy)]
+            else:
+                ring_cells = [(cx + dx, cy + dy) for dx in (-ring, ring) for dy in range(-ring, ring + 1)]
+                ring_cells += [(cx + dx, cy + dy) for dx in range(-ring + 1, ring) for dy in (-ring, ring)]
+            ids = np.concatenate([ids, self.candidates(ring_cells)])
+            
+            # Everything outside this ring is at least `reach` meters away
+            reach = ring * self.cell_size
+            covered = cx - ring <= x_lo and cx + ring >= x_hi and cy - ring <= y_lo and cy + ring >= y_hi
+            if max_distance is not None and reach >= max_distance:
+                break
+            if covered or (len(ids) >= n and np.partition(self.distances(ids, x, y), n - 1)[n - 1] <= reach):
+                break
+            ring += 1
+        
+        distances = self.distances(ids, x, y)
+        if max_distance is not None:
+            ids, distances = ids[distances <= max_distance], distances[distances <= max_distance]
+        closest = np.argsort(distances, kind="stable")[:n]
+        return ids[closest], distances[closest]
+    
+    def within_radius(self, lat, lng, radius):
+        """Restaurants within `radius` meters of a point, as (ids, distances), closest first."""
+        
+        x, y = self.project(lat, lng)
+        ids = self.candidates(self.cells_in_box(x - radius, y - radius, x + radius, y + radius))
+        distances = self.distances(ids, x, y)
+        inside = distances <= radius
+        ids, distances = ids[inside], distances[inside]
+        closest = np.argsort(distances, kind="stable")
+        return ids[closest], distances[closest]
+    
+    def within_bbox(self, south, west, north, east):
+        """Ids of the restaurants inside a latitude/longitude box, ascending."""
+        
+        x_min, y_min = self.project(south, west)
+        x_max, y_max = self.project(north, east)
+        ids = self.candidates(self.cells_in_box(x_min, y_min, x_max, y_max))
+        inside = ((self.lat[ids] >= south) & (self.lat[ids] <= north)
+                  & (self.lng[ids] >= west) & (self.lng[ids] <= east))
+        return np.sort(ids[inside])
+    
+    def records(self, ids, distances=None):
+        """The restaurants for `ids` as a DataFrame, with a "Distance (m)" column if given."""
+        
+        rows = self.df.iloc[ids].copy()
+        if distances is not None:
+            rows["Distance (m)"] = np.round(distances, 1)
+        return rows
+
+
+if __name__ == "__main__":
+    # Example: what's near Times Square, and how long the queries take
+    index = SpatialIndex.from_json("restaurants.json")
+    lat, lng = 40.7580, -73.9855
+    
+    ids, distances = index.nearest(lat, lng, n=5)
+    print(index.records(ids, distances)[["Restaurant", "Cuisine", "Address", "Distance (m)"]].to_string(index=False))
+    
+    for name, query in [
+        ("nearest(n=5)", lambda: index.nearest(lat, lng, n=5)),
+        ("within_radius(500 m)", lambda: index.within_radius(lat, lng, 500)),
+        ("within_bbox(~1 km)", lambda: index.within_bbox(lat - 0.005, lng - 0.006, lat + 0.005, lng + 0.006)),
+    ]:
+        runs = 2000
+        seconds = timeit.timeit(query, number=runs)
+        print(f"⏱ {name}: {seconds / runs * 1e6:.1f} µs per query")